@@ -0,0 +1,103 @@
+"""Versioned encoding of cached task values (`task:{id}` and the `tasks:snapshot`
+hash, which store the same bytes) and of the stale task list.
+
+Every encoded value starts with a one-byte format tag so codecs can change
+while old entries are still in Redis. Legacy values are plain JSON objects and
+start with "{", which no tag uses, so they keep decoding during a rollout.
+
+CACHE_CODEC picks what new writes use:
+  - "json":    plain JSON (the legacy format)
+  - "msgpack": msgpack with one-letter field names; values whose encoding is
+               at least CACHE_COMPRESS_MIN_BYTES are zlib-compressed when that
+               makes them smaller
+
+The stale list (`tasks:list:stale`) is one JSON array, always zlib-compressed:
+field names repeat in every task, so it shrinks to about a quarter.
+"""
+import os
+import zlib
+from datetime import datetime
+from typing import Any, Callable, Dict
+
+from app.serialization import dumps, loads
+
+try:
+    import msgpack  # type: ignore
+except Exception:  # pragma: no cover - fallback if msgpack is not installed
+    msgpack = None  # type: ignore
+
+CACHE_CODEC = os.getenv("CACHE_CODEC", "msgpack" if msgpack else "json")
+CACHE_COMPRESS_MIN_BYTES = int(os.getenv("CACHE_COMPRESS_MIN_BYTES", "512"))
+CACHE_COMPRESS_LEVEL = int(os.getenv("CACHE_COMPRESS_LEVEL", "1"))
+
+# Format tags (first byte of an encoded value)
+TAG_MSGPACK = b"\x01"
+TAG_MSGPACK_ZLIB = b"\x02"
+TAG_JSON_ZLIB = b"\x03"
+
+# Short field names for the msgpack format; unknown fields are stored as-is
+_FIELD_TAGS = {
+    "id": "i",
+    "title": "t",
+    "description": "d",
+    "is_completed": "c",
+    "created_at": "a",
+    "updated_at": "u",
+    "version": "v",
+}
+_FIELD_NAMES = {tag: name for name, tag in _FIELD_TAGS.items()}
+
+
+def _default(obj: Any) -> Any:
+    # Same datetime representation as the JSON encoder
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Type {type(obj)} not serializable")
+
+
+def _pack(task: dict) -> bytes:
+    packed = msgpack.packb({_FIELD_TAGS.get(k, k): v for k, v in task.items()}, default=_default)
+    if len(packed) >= CACHE_COMPRESS_MIN_BYTES:
+        compressed = zlib.compress(packed, CACHE_COMPRESS_LEVEL)
+        if len(compressed) < len(packed):
+            return TAG_MSGPACK_ZLIB + compressed
+    return TAG_MSGPACK + packed
+
+
+def _unpack(body: bytes) -> dict:
+    return {_FIELD_NAMES.get(k, k): v for k, v in msgpack.unpackb(body).items()}
+
+
+_ENCODERS: Dict[str, Callable[[dict], bytes]] = {"json": dumps}
+_DECODERS: Dict[bytes, Callable[[bytes], dict]] = {}
+if msgpack:
+    _ENCODERS["msgpack"] = _pack
+    _DECODERS[TAG_MSGPACK] = _unpack
+    _DECODERS[TAG_MSGPACK_ZLIB] = lambda body: _unpack(zlib.decompress(body))
+
+if CACHE_CODEC not in _ENCODERS:
+    raise ValueError(f"Unknown or unavailable CACHE_CODEC {CACHE_CODEC!r}; choose from {sorted(_ENCODERS)}")
+
+encode_task: Callable[[dict], bytes] = _ENCODERS[CACHE_CODEC]
+
+
+def decode_task(raw: bytes) -> dict:
+    """Decode a cached task in any known format, including legacy JSON"""
+    tag = raw[:1]
+    if tag == b"{":
+        return loads(raw)
+    decoder = _DECODERS.get(tag)
+    if decoder is None:
+        raise ValueError(f"Unknown cache format tag {tag!r}")
+    return decoder(raw[1:])
+
+
+def encode_task_list(tasks: list) -> bytes:
+    return TAG_JSON_ZLIB + zlib.compress(dumps(tasks), CACHE_COMPRESS_LEVEL)
+
+
+def decode_task_list(raw: bytes) -> list:
+    """Decode a cached task list, including legacy plain JSON arrays"""
+    if raw[:1] == TAG_JSON_ZLIB:
+        return loads(zlib.decompress(raw[1:]))
+    return loads(raw)
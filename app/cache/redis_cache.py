@@ -1,15 +1,34 @@
 import redis  # sync client for worker
 import os
-import json
+import time
+import uuid
+import asyncio
 import logging
-from typing import List, Tuple
-from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from app.cache.codec import decode_task, decode_task_list, encode_task, encode_task_list
+from app.cache.l1_cache import L1Cache
+from app.metrics import cache_hit, cache_miss
+from app.serialization import dumps, loads
 
 logger = logging.getLogger(__name__)
 
 # Use asyncio client for API runtime, and sync client for Celery worker
 REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
 CACHE_TTL_SECONDS = int(os.getenv("CACHE_TTL_SECONDS", "60"))
+# Max commands queued per pipeline round trip in the bulk helpers
+CACHE_PIPELINE_CHUNK_SIZE = int(os.getenv("CACHE_PIPELINE_CHUNK_SIZE", "1000"))
+# Cross-process refill lock and the stale copy served while a refill runs
+CACHE_LOCK_TTL_MS = int(os.getenv("CACHE_LOCK_TTL_MS", "5000"))
+CACHE_STALE_TTL_SECONDS = int(os.getenv("CACHE_STALE_TTL_SECONDS", "300"))
+# How long a "no such task" lookup is remembered
+CACHE_NEGATIVE_TTL_SECONDS = int(os.getenv("CACHE_NEGATIVE_TTL_SECONDS", "5"))
+# Optional in-process L1 in front of the async client (API only)
+L1_CACHE_ENABLED = os.getenv("L1_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+L1_CACHE_MAX_ENTRIES = int(os.getenv("L1_CACHE_MAX_ENTRIES", "10000"))
+L1_CACHE_MAX_BYTES = int(os.getenv("L1_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+L1_CACHE_TTL_SECONDS = float(os.getenv("L1_CACHE_TTL_SECONDS", "30"))
+# Projected changes kept for change feed replay (GET /v1/tasks/changes); 0 turns the feed off
+CHANGE_FEED_MAX_LEN = int(os.getenv("CHANGE_FEED_MAX_LEN", "10000"))
 
 try:
     # redis>=4 provides asyncio submodule
@@ -18,38 +37,366 @@ except Exception:  # pragma: no cover - fallback if package lacks asyncio
     aioredis = None  # type: ignore
 
 
-def _default_serializer(obj):
-    if isinstance(obj, datetime):
-        return obj.isoformat()
-    raise TypeError(f"Type {type(obj)} not serializable")
-
-
 # Keys
 def _task_key(task_id: str) -> str:
     return f"task:{task_id}"
 
 
+def _missing_key(task_id: str) -> str:
+    return f"task:missing:{task_id}"
+
+
 TASK_INDEX_KEY = "tasks:index"  # set of task ids
+TASK_LIST_STALE_KEY = "tasks:list:stale"  # compressed JSON list from the last full refill
+INVALIDATION_CHANNEL = "tasks:invalidate"  # pub/sub: JSON list of changed task ids (L1, read-your-writes)
+
+
+def _lock_key(name: str) -> str:
+    return f"lock:{name}"
+
+
+# Delete the lock only if we still own it
+_RELEASE_LOCK_LUA = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def _chunks(items: List, size: int = CACHE_PIPELINE_CHUNK_SIZE) -> Iterable[List]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+TASK_VERSIONS_KEY = "tasks:versions"  # hash task id -> last applied version (deletes kept until purged)
+# The list: hash task id -> codec-encoded task (same bytes as task:{id}, but no TTL),
+# maintained with every task write; only served once a full fill has set TASK_SNAPSHOT_READY_KEY
+TASK_SNAPSHOT_KEY = "tasks:snapshot"
+TASK_SNAPSHOT_READY_KEY = "tasks:snapshot:ready"
+# Task ids by status, maintained next to the snapshot (same ready flag); SCARD is the count
+TASK_COMPLETED_KEY = "tasks:status:completed"
+TASK_OPEN_KEY = "tasks:status:open"
+# Bumped whenever the snapshot's content changes; the list ETag (If-None-Match -> 304)
+TASK_COLLECTION_VERSION_KEY = "tasks:collection:version"
+# Change feed: capped stream of projected changes, entry id "{seq}-0", and its sequence
+# counter; each applied batch is also published on CHANGE_FEED_CHANNEL (one event per line)
+CHANGE_FEED_STREAM_KEY = "tasks:changes"
+CHANGE_FEED_SEQ_KEY = "tasks:changes:seq"
+CHANGE_FEED_CHANNEL = "tasks:changes"
+
+
+def _status_key(is_completed: bool) -> str:
+    return TASK_COMPLETED_KEY if is_completed else TASK_OPEN_KEY
+
+
+# Version-guarded writes (compare-and-set on TASK_VERSIONS_KEY).
+# KEYS[1] index set, KEYS[2] versions hash, KEYS[3] snapshot hash,
+# KEYS[4] completed ids set, KEYS[5] open ids set, KEYS[6] collection version,
+# KEYS[7] change feed stream, KEYS[8] change feed sequence
+# ARGV[1] ttl, ARGV[2] invalidation channel ('' = don't publish),
+# ARGV[3] counter seed (collection version, change feed sequence),
+# ARGV[4] change feed max length ('' = no feed), ARGV[5] change feed channel, then per change:
+#   op, id, version, value (codec-encoded, for task:{id} and the snapshot),
+#   json (the change feed event's task; '' when there is no feed),
+#   completed ('1' / '0'); op is 'u' (upsert if newer), 'r' (refill if not older)
+#   or 'd' (delete if newer). Returns the ids that were applied.
+# The collection version is bumped once per call if any change was newer than
+# what was cached (a same-version refill rewrites identical content). Every applied
+# upsert or delete gets the next feed sequence number and is appended to the feed
+# as a JSON event {seq, type (created/updated/deleted), id, version, task}.
+_APPLY_CHANGES_LUA = """
+local applied = {}
+local events = {}
+local changed = false
+if ARGV[4] ~= '' then
+    redis.call('SET', KEYS[8], ARGV[3], 'NX')
+end
+for i = 6, #ARGV, 6 do
+    local op, id, version, value = ARGV[i], ARGV[i + 1], tonumber(ARGV[i + 2]), ARGV[i + 3]
+    local current = tonumber(redis.call('HGET', KEYS[2], id) or 0)
+    if version > current or (op == 'r' and version == current) then
+        changed = changed or version > current
+        redis.call('HSET', KEYS[2], id, version)
+        if op == 'd' then
+            redis.call('DEL', 'task:' .. id)
+            redis.call('SREM', KEYS[1], id)
+            redis.call('HDEL', KEYS[3], id)
+            redis.call('SREM', KEYS[4], id)
+            redis.call('SREM', KEYS[5], id)
+        else
+            redis.call('SET', 'task:' .. id, value, 'EX', ARGV[1])
+            redis.call('SADD', KEYS[1], id)
+            redis.call('HSET', KEYS[3], id, value)
+            if ARGV[i + 5] == '1' then
+                redis.call('SADD', KEYS[4], id)
+                redis.call('SREM', KEYS[5], id)
+            else
+                redis.call('SADD', KEYS[5], id)
+                redis.call('SREM', KEYS[4], id)
+            end
+            redis.call('DEL', 'task:missing:' .. id)
+        end
+        applied[#applied + 1] = id
+        if ARGV[4] ~= '' and op ~= 'r' then
+            local kind, task = 'deleted', 'null'
+            if op ~= 'd' then
+                kind = current == 0 and 'created' or 'updated'
+                task = ARGV[i + 4]
+            end
+            local seq = string.format('%d', redis.call('INCR', KEYS[8]))
+            local event = '{"seq":' .. seq .. ',"type":"' .. kind .. '","id":' .. cjson.encode(id)
+                .. ',"version":' .. ARGV[i + 2] .. ',"task":' .. task .. '}'
+            redis.call('XADD', KEYS[7], 'MAXLEN', '~', ARGV[4], seq .. '-0', 'data', event)
+            events[#events + 1] = event
+        end
+    end
+end
+if changed then
+    redis.call('SET', KEYS[6], ARGV[3], 'NX')
+    redis.call('INCR', KEYS[6])
+end
+if #applied > 0 and ARGV[2] ~= '' then
+    redis.call('PUBLISH', ARGV[2], cjson.encode(applied))
+end
+if #events > 0 then
+    redis.call('PUBLISH', ARGV[5], table.concat(events, '\\n'))
+end
+return applied
+"""
+
+_APPLY_CHANGES_KEYS = [
+    TASK_INDEX_KEY, TASK_VERSIONS_KEY, TASK_SNAPSHOT_KEY, TASK_COMPLETED_KEY, TASK_OPEN_KEY,
+    TASK_COLLECTION_VERSION_KEY, CHANGE_FEED_STREAM_KEY, CHANGE_FEED_SEQ_KEY,
+]
+
+
+def _collection_version_seed() -> int:
+    """Starting value if a counter is missing (fresh or flushed Redis): above any
+    value the lost counter could have reached, so old ETags and change feed
+    sequence numbers never match again"""
+    return int(time.time() * 1000) * 1000
+
+# Snapshot values of one status set, read atomically; nil until the snapshot is ready.
+# KEYS[1] ready flag, KEYS[2] snapshot hash, KEYS[3] status set
+_SNAPSHOT_BY_STATUS_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return false
+end
+local ids = redis.call('SMEMBERS', KEYS[3])
+local values = {}
+for i = 1, #ids, 1000 do
+    local chunk = redis.call('HMGET', KEYS[2], unpack(ids, i, math.min(i + 999, #ids)))
+    for _, value in ipairs(chunk) do
+        if value then
+            values[#values + 1] = value
+        end
+    end
+end
+return values
+"""
+
+# Forget delete versions past the retention horizon (app.cache_reconciler), only
+# where the hash still holds that delete. KEYS[1] versions hash; ARGV id, version pairs
+_FORGET_VERSIONS_LUA = """
+local removed = 0
+for i = 1, #ARGV, 2 do
+    if redis.call('HGET', KEYS[1], ARGV[i]) == ARGV[i + 1] then
+        redis.call('HDEL', KEYS[1], ARGV[i])
+        removed = removed + 1
+    end
+end
+return removed
+"""
+
+_Change = Tuple[str, str, int, bytes, bytes, str]
+
+
+def _upsert_change(op: str, task: dict, feed: bool = False) -> _Change:
+    completed = "1" if task.get("is_completed") else "0"
+    event_task = dumps(task) if feed else ""
+    return op, task["id"], task.get("version") or 1, encode_task(task), event_task, completed
+
+
+def _apply_changes_args(changes: List[_Change], publish: bool) -> List:
+    # Only projected changes go to the change feed; refills rewrite what clients already saw
+    feed = publish and CHANGE_FEED_MAX_LEN > 0
+    args = [
+        CACHE_TTL_SECONDS,
+        INVALIDATION_CHANNEL if publish else "",
+        _collection_version_seed(),
+        CHANGE_FEED_MAX_LEN if feed else "",
+        CHANGE_FEED_CHANNEL,
+    ]
+    for change in changes:
+        args.extend(change)
+    return args
+
+
+def _queue_bump_collection_version(pipe) -> None:
+    pipe.set(TASK_COLLECTION_VERSION_KEY, _collection_version_seed(), nx=True)
+    pipe.incr(TASK_COLLECTION_VERSION_KEY)
+
+
+def _queue_remove_tasks(pipe, task_ids: List[str]) -> None:
+    pipe.delete(*[_task_key(task_id) for task_id in task_ids])
+    pipe.srem(TASK_INDEX_KEY, *task_ids)
+    pipe.hdel(TASK_SNAPSHOT_KEY, *task_ids)
+    pipe.srem(TASK_COMPLETED_KEY, *task_ids)
+    pipe.srem(TASK_OPEN_KEY, *task_ids)
+    _queue_bump_collection_version(pipe)
 
 
 # ---------- Async API (FastAPI) ----------
 _async_client = aioredis.from_url(
     REDIS_URL, decode_responses=True) if aioredis else None
 
+# task:{id} values are binary (see app/cache/codec.py), so they are read without decoding
+_async_raw_client = aioredis.from_url(REDIS_URL) if aioredis else None
+
+_async_apply_changes = _async_client.register_script(_APPLY_CHANGES_LUA) if _async_client else None
+_async_snapshot_by_status = _async_raw_client.register_script(_SNAPSHOT_BY_STATUS_LUA) if _async_raw_client else None
+_async_forget_versions = _async_client.register_script(_FORGET_VERSIONS_LUA) if _async_client else None
+
+l1_cache: Optional[L1Cache] = L1Cache(
+    L1_CACHE_MAX_ENTRIES, L1_CACHE_MAX_BYTES, L1_CACHE_TTL_SECONDS
+) if L1_CACHE_ENABLED else None
+
 
-async def cache_add_task_async(task: dict) -> None:
+def _l1_get(task_id: str) -> Optional[dict]:
+    return l1_cache.get(task_id) if l1_cache else None
+
+
+def _l1_set(task_id: str, task: dict, raw: bytes) -> None:
+    if l1_cache:
+        l1_cache.set(task_id, task, len(raw))
+
+
+def _l1_invalidate(task_ids: Iterable[str]) -> None:
+    if l1_cache:
+        for task_id in task_ids:
+            l1_cache.invalidate(task_id)
+
+
+# Read-your-writes: requests waiting for the projector to apply a task id
+_change_waiters: Dict[str, Set[asyncio.Future]] = {}
+
+
+def _notify_changed(task_ids: Iterable[str]) -> None:
+    for task_id in task_ids:
+        for waiter in _change_waiters.pop(task_id, ()):
+            if not waiter.done():
+                waiter.set_result(None)
+
+
+def cache_watch_task(task_id: str) -> asyncio.Future:
+    """Future resolved the next time the projector applies a change to `task_id`.
+    Register before reading, so a change landing in between is not missed;
+    release it with `cache_unwatch_task`."""
+    waiter = asyncio.get_running_loop().create_future()
+    _change_waiters.setdefault(task_id, set()).add(waiter)
+    return waiter
+
+
+def cache_unwatch_task(task_id: str, waiter: asyncio.Future) -> None:
+    waiters = _change_waiters.get(task_id)
+    if waiters is not None:
+        waiters.discard(waiter)
+        if not waiters:
+            del _change_waiters[task_id]
+
+
+async def run_invalidation_listener() -> None:
+    """Follow INVALIDATION_CHANNEL for the API's lifetime: drop L1 entries for
+    changed tasks and wake requests waiting on them (cache_watch_task)"""
     if not _async_client:
         return
-    task_id = task["id"]
-    await _async_client.set(_task_key(task_id), json.dumps(task, default=_default_serializer), ex=CACHE_TTL_SECONDS)
-    await _async_client.sadd(TASK_INDEX_KEY, task_id)
+    while True:
+        pubsub = _async_client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            # Anything published while we were not subscribed is unknown
+            if l1_cache:
+                l1_cache.clear()
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    task_ids = loads(message["data"])
+                    _l1_invalidate(task_ids)
+                    _notify_changed(task_ids)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Invalidation listener error, resubscribing: {e}")
+            await asyncio.sleep(1)
+        finally:
+            await pubsub.aclose()
+
+
+async def cache_add_tasks_async(tasks: List[dict]) -> None:
+    """Refill tasks read from the DB; never overwrites a newer cached version.
+    One pipelined round trip per CACHE_PIPELINE_CHUNK_SIZE tasks."""
+    if not _async_client or not tasks:
+        return
+    changes = [_upsert_change("r", task) for task in tasks]
+    pipe = _async_client.pipeline(transaction=False)
+    for chunk in _chunks(changes):
+        await _async_apply_changes(
+            keys=_APPLY_CHANGES_KEYS,
+            args=_apply_changes_args(chunk, publish=False),
+            client=pipe,
+        )
+    await pipe.execute()
+
+
+async def cache_apply_changes_async(upserts: List[dict], deletes: List[Tuple[str, int]]) -> List[str]:
+    """cache_apply_changes_sync for the asyncio projector (app.projector)"""
+    changes = _projected_changes(upserts, deletes)
+    if not _async_client or not changes:
+        return []
+    pipe = _async_client.pipeline(transaction=False)
+    for chunk in _chunks(changes):
+        await _async_apply_changes(
+            keys=_APPLY_CHANGES_KEYS,
+            args=_apply_changes_args(chunk, publish=True),
+            client=pipe,
+        )
+    return [task_id for applied in await pipe.execute() for task_id in applied]
+
+
+async def cache_remove_tasks_async(task_ids: List[str]) -> None:
+    _l1_invalidate(task_ids)
+    if not _async_client or not task_ids:
+        return
+    for chunk in _chunks(task_ids):
+        pipe = _async_client.pipeline(transaction=False)
+        _queue_remove_tasks(pipe, chunk)
+        await pipe.execute()
+
 
+async def cache_get_task_async(task_id: str) -> Tuple[Optional[dict], bool]:
+    """Returns (task, known_missing); (None, False) is a plain cache miss"""
+    cached = _l1_get(task_id)
+    if cached is not None:
+        return cached, False
+    if not _async_raw_client:
+        return None, False
+    pipe = _async_raw_client.pipeline(transaction=False)
+    pipe.get(_task_key(task_id))
+    pipe.exists(_missing_key(task_id))
+    raw, missing = await pipe.execute()
+    if raw:
+        cache_hit("task")
+        task = decode_task(raw)
+        _l1_set(task_id, task, raw)
+        return task, False
+    cache_miss("task")
+    return None, bool(missing)
 
-async def cache_remove_task_async(task_id: str) -> None:
+
+async def cache_set_missing_async(task_id: str) -> None:
     if not _async_client:
         return
-    await _async_client.delete(_task_key(task_id))
-    await _async_client.srem(TASK_INDEX_KEY, task_id)
+    await _async_client.set(_missing_key(task_id), 1, ex=CACHE_NEGATIVE_TTL_SECONDS)
 
 
 async def cache_get_all_ids_async() -> List[str]:
@@ -60,47 +407,306 @@ async def cache_get_all_ids_async() -> List[str]:
 
 
 async def cache_get_tasks_by_ids_async(task_ids: List[str]) -> Tuple[List[dict], List[str]]:
-    if not _async_client or not task_ids:
+    if not _async_raw_client or not task_ids:
         return [], task_ids
-    pipe = _async_client.pipeline()
+    tasks: List[dict] = []
+    remote_ids: List[str] = []
     for task_id in task_ids:
+        cached = _l1_get(task_id)
+        if cached is not None:
+            tasks.append(cached)
+        else:
+            remote_ids.append(task_id)
+    missing: List[str] = []
+    if not remote_ids:
+        return tasks, missing
+    pipe = _async_raw_client.pipeline()
+    for task_id in remote_ids:
         pipe.get(_task_key(task_id))
     raw_values = await pipe.execute()
-    tasks: List[dict] = []
-    missing: List[str] = []
-    for task_id, raw in zip(task_ids, raw_values):
+    for task_id, raw in zip(remote_ids, raw_values):
         if raw:
-            tasks.append(json.loads(raw))
+            task = decode_task(raw)
+            _l1_set(task_id, task, raw)
+            tasks.append(task)
         else:
             missing.append(task_id)
+    cache_hit("task", len(remote_ids) - len(missing))
+    cache_miss("task", len(missing))
     return tasks, missing
 
 
 async def cache_set_index_async(task_ids: List[str]) -> None:
     if not _async_client:
         return
-    await _async_client.delete(TASK_INDEX_KEY)
+    # MULTI/EXEC so readers never observe the index between DELETE and SADD
+    pipe = _async_client.pipeline(transaction=True)
+    pipe.delete(TASK_INDEX_KEY)
     if task_ids:
-        await _async_client.sadd(TASK_INDEX_KEY, *task_ids)
+        pipe.sadd(TASK_INDEX_KEY, *task_ids)
+    await pipe.execute()
+
+
+async def cache_mark_snapshot_ready_async() -> None:
+    if not _async_client:
+        return
+    pipe = _async_client.pipeline(transaction=True)
+    pipe.set(TASK_SNAPSHOT_READY_KEY, 1)
+    # A (re)built snapshot may differ from what earlier ETags described
+    _queue_bump_collection_version(pipe)
+    await pipe.execute()
+
+
+async def cache_clear_list_async() -> None:
+    """Drop the snapshot, its ready flag, the index and the status sets (read model
+    reset); the collection version is bumped so earlier list ETags stop matching"""
+    if not _async_client:
+        return
+    pipe = _async_client.pipeline(transaction=True)
+    pipe.delete(TASK_SNAPSHOT_READY_KEY, TASK_INDEX_KEY, TASK_SNAPSHOT_KEY, TASK_COMPLETED_KEY, TASK_OPEN_KEY)
+    _queue_bump_collection_version(pipe)
+    await pipe.execute()
+
+
+async def cache_get_collection_version_async() -> Optional[int]:
+    """The list's change counter (one GET); None if nothing has been cached yet"""
+    if not _async_client:
+        return None
+    version = await _async_client.get(TASK_COLLECTION_VERSION_KEY)
+    return int(version) if version is not None else None
+
+
+async def cache_get_task_version_async(task_id: str) -> Optional[int]:
+    """Last version applied to the cache for a task (deleted tasks keep their delete version)"""
+    if not _async_client:
+        return None
+    version = await _async_client.hget(TASK_VERSIONS_KEY, task_id)
+    return int(version) if version is not None else None
+
+
+async def cache_get_deleted_version_async(task_id: str) -> Optional[int]:
+    """Version of the delete applied to the cache for a task; None if the task is
+    not known to be deleted (still indexed, or never projected)"""
+    if not _async_client:
+        return None
+    pipe = _async_client.pipeline(transaction=False)
+    pipe.hget(TASK_VERSIONS_KEY, task_id)
+    pipe.sismember(TASK_INDEX_KEY, task_id)
+    version, indexed = await pipe.execute()
+    return int(version) if version is not None and not indexed else None
+
+
+async def cache_get_change_seq_async() -> Optional[int]:
+    """Sequence number of the last change feed event; None if the feed is empty"""
+    if not _async_client:
+        return None
+    seq = await _async_client.get(CHANGE_FEED_SEQ_KEY)
+    return int(seq) if seq is not None else None
+
+
+async def cache_read_changes_async(after_seq: int, count: int) -> List[Tuple[int, str]]:
+    """Up to `count` change feed events after `after_seq`, as (seq, event JSON), oldest first"""
+    if not _async_client:
+        return []
+    entries = await _async_client.xrange(CHANGE_FEED_STREAM_KEY, min=f"{after_seq + 1}-0", max="+", count=count)
+    return [(int(entry_id.split("-", 1)[0]), fields["data"]) for entry_id, fields in entries]
+
+
+# Rendered list bodies by status (None = all tasks): (collection version, JSON array).
+# Snapshot values are codec-encoded, so each process decodes the list once per change.
+_snapshot_bodies: Dict[Optional[bool], Tuple[int, bytes]] = {}
+
+
+def _render_snapshot(values: List[bytes]) -> bytes:
+    if all(value[:1] == b"{" for value in values):
+        # JSON values (CACHE_CODEC=json, or written before the codec): join, never decode
+        return b"[" + b",".join(values) + b"]"
+    return dumps([decode_task(value) for value in values])
+
+
+async def cache_get_snapshot_async(is_completed: Optional[bool] = None) -> Optional[bytes]:
+    """The task list (optionally one status) as a ready-to-send JSON array, or None if not built yet"""
+    if not _async_raw_client:
+        return None
+    pipe = _async_raw_client.pipeline(transaction=True)
+    pipe.exists(TASK_SNAPSHOT_READY_KEY)
+    pipe.get(TASK_COLLECTION_VERSION_KEY)
+    ready, version = await pipe.execute()
+    if not ready:
+        cache_miss("snapshot")
+        return None
+    version = int(version) if version is not None else None
+    rendered = _snapshot_bodies.get(is_completed)
+    if rendered is not None and version is not None and rendered[0] == version:
+        cache_hit("snapshot")
+        return rendered[1]
+    if is_completed is None:
+        pipe = _async_raw_client.pipeline(transaction=True)
+        pipe.exists(TASK_SNAPSHOT_READY_KEY)
+        pipe.hvals(TASK_SNAPSHOT_KEY)
+        ready, values = await pipe.execute()
+        if not ready:
+            values = None
+    else:
+        values = await _async_snapshot_by_status(
+            keys=[TASK_SNAPSHOT_READY_KEY, TASK_SNAPSHOT_KEY, _status_key(is_completed)],
+            client=_async_raw_client,
+        )
+    if values is None:
+        cache_miss("snapshot")
+        return None
+    cache_hit("snapshot")
+    body = _render_snapshot(values)
+    if version is not None:
+        # Read before the values: a body is never older than the version it is kept under
+        _snapshot_bodies[is_completed] = (version, body)
+    return body
+
+
+async def cache_count_tasks_async(is_completed: Optional[bool] = None) -> Optional[int]:
+    """O(1) task count (optionally one status), or None until the snapshot is ready"""
+    if not _async_client:
+        return None
+    pipe = _async_client.pipeline(transaction=True)
+    pipe.exists(TASK_SNAPSHOT_READY_KEY)
+    if is_completed is None:
+        pipe.hlen(TASK_SNAPSHOT_KEY)
+    else:
+        pipe.scard(_status_key(is_completed))
+    ready, count = await pipe.execute()
+    return int(count) if ready else None
+
+
+async def cache_scan_index_async(cursor: int, count: int) -> Tuple[int, List[str]]:
+    """One SSCAN step over the task index; cursor 0 starts and ends a pass"""
+    if not _async_client:
+        return 0, []
+    next_cursor, task_ids = await _async_client.sscan(TASK_INDEX_KEY, cursor, count=count)
+    return int(next_cursor), list(task_ids)
+
+
+async def cache_inspect_tasks_async(task_ids: List[str]) -> List[Tuple[int, Optional[int], int]]:
+    """(TTL seconds, -2 if the key is gone; idle seconds or None if Redis does not
+    track it; last applied version) per task id, in one pipelined round trip"""
+    if not _async_client or not task_ids:
+        return []
+    pipe = _async_client.pipeline(transaction=False)
+    for task_id in task_ids:
+        pipe.ttl(_task_key(task_id))
+        # Neither TTL nor OBJECT touches the key, so this does not make keys look hot
+        pipe.object("idletime", _task_key(task_id))
+    pipe.hmget(TASK_VERSIONS_KEY, task_ids)
+    results = await pipe.execute(raise_on_error=False)
+    versions = results[-1]
+    inspected = []
+    for i, version in enumerate(versions):
+        ttl, idle = results[2 * i], results[2 * i + 1]
+        # OBJECT IDLETIME fails under an LFU maxmemory policy
+        idle = idle if isinstance(idle, int) else None
+        inspected.append((ttl, idle, int(version or 0)))
+    return inspected
+
+
+async def cache_forget_versions_async(deletes: List[Tuple[str, int]], versions_key: str = TASK_VERSIONS_KEY) -> int:
+    """Drop (task id, delete version) entries from a versions hash (TASK_VERSIONS_KEY by
+    default) that still hold that version; returns how many were dropped"""
+    if not _async_client or not deletes:
+        return 0
+    pipe = _async_client.pipeline(transaction=False)
+    for chunk in _chunks(deletes):
+        await _async_forget_versions(
+            keys=[versions_key],
+            args=[arg for task_id, version in chunk for arg in (task_id, version)],
+            client=pipe,
+        )
+    return sum(await pipe.execute())
+
+
+async def cache_renew_tasks_async(task_ids: List[str]) -> None:
+    """Reset task:{id} TTLs without rewriting the values"""
+    if not _async_client or not task_ids:
+        return
+    for chunk in _chunks(task_ids):
+        pipe = _async_client.pipeline(transaction=False)
+        for task_id in chunk:
+            pipe.expire(_task_key(task_id), CACHE_TTL_SECONDS)
+        await pipe.execute()
+
+
+async def cache_try_lock_async(name: str, ttl_ms: int = CACHE_LOCK_TTL_MS) -> Optional[str]:
+    """Acquire a short-lived cross-process lock; returns the owner token or None"""
+    if not _async_client:
+        return None
+    token = uuid.uuid4().hex
+    acquired = await _async_client.set(_lock_key(name), token, nx=True, px=ttl_ms)
+    return token if acquired else None
+
+
+async def cache_release_lock_async(name: str, token: str) -> None:
+    if not _async_client:
+        return
+    await _async_client.eval(_RELEASE_LOCK_LUA, 1, _lock_key(name), token)
+
+
+async def cache_wait_for_unlock_async(name: str, timeout_ms: int = CACHE_LOCK_TTL_MS) -> bool:
+    """Poll until the lock is released (or expires); False on timeout"""
+    if not _async_client:
+        return True
+    deadline = asyncio.get_running_loop().time() + timeout_ms / 1000
+    while await _async_client.exists(_lock_key(name)):
+        if asyncio.get_running_loop().time() >= deadline:
+            return False
+        await asyncio.sleep(0.05)
+    return True
+
+
+async def cache_set_stale_list_async(tasks: List[dict]) -> None:
+    if not _async_raw_client:
+        return
+    await _async_raw_client.set(TASK_LIST_STALE_KEY, encode_task_list(tasks), ex=CACHE_STALE_TTL_SECONDS)
+
+
+async def cache_get_stale_list_async() -> Optional[List[dict]]:
+    if not _async_raw_client:
+        return None
+    raw = await _async_raw_client.get(TASK_LIST_STALE_KEY)
+    return decode_task_list(raw) if raw else None
 
 
 # ---------- Sync API (Celery worker) ----------
 _sync_client = redis.from_url(REDIS_URL, decode_responses=True)
+_sync_apply_changes = _sync_client.register_script(_APPLY_CHANGES_LUA)
 
 
-def cache_add_task_sync(task: dict) -> None:
-    task_id = task["id"]
-    _sync_client.set(_task_key(task_id), json.dumps(
-        task, default=_default_serializer), ex=CACHE_TTL_SECONDS)
-    _sync_client.sadd(TASK_INDEX_KEY, task_id)
+def _projected_changes(upserts: List[dict], deletes: List[Tuple[str, int]]) -> List[_Change]:
+    changes = [_upsert_change("u", task, feed=CHANGE_FEED_MAX_LEN > 0) for task in upserts]
+    changes.extend(("d", task_id, version, "", "", "") for task_id, version in deletes)
+    return changes
 
 
-def cache_remove_task_sync(task_id: str) -> None:
-    _sync_client.delete(_task_key(task_id))
-    _sync_client.srem(TASK_INDEX_KEY, task_id)
+def cache_apply_changes_sync(upserts: List[dict], deletes: List[Tuple[str, int]]) -> List[str]:
+    """Version-guarded write of projected changes in a single pipelined round trip.
+
+    `upserts` are task dicts carrying "version"; `deletes` are (task id, version).
+    Stale changes are skipped; applied ids are published on INVALIDATION_CHANNEL.
+    Returns the applied ids.
+    """
+    changes = _projected_changes(upserts, deletes)
+    if not changes:
+        return []
+    pipe = _sync_client.pipeline(transaction=False)
+    for chunk in _chunks(changes):
+        _sync_apply_changes(
+            keys=_APPLY_CHANGES_KEYS,
+            args=_apply_changes_args(chunk, publish=True),
+            client=pipe,
+        )
+    return [task_id for applied in pipe.execute() for task_id in applied]
 
 
 def cache_set_index_sync(task_ids: List[str]) -> None:
-    _sync_client.delete(TASK_INDEX_KEY)
+    pipe = _sync_client.pipeline(transaction=True)
+    pipe.delete(TASK_INDEX_KEY)
     if task_ids:
-        _sync_client.sadd(TASK_INDEX_KEY, *task_ids)
+        pipe.sadd(TASK_INDEX_KEY, *task_ids)
+    pipe.execute()
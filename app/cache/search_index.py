@@ -0,0 +1,199 @@
+"""Inverted index over task titles and descriptions, kept in Redis.
+
+- `search:term:{token}`: sorted set task id -> term score in that task
+- `search:doc:{id}`: hash token -> score, so an update can drop the old tokens
+- `search:docs`: set of indexed task ids (document count for IDF)
+- `search:versions`: hash task id -> indexed version, the same compare-and-set
+  guard as the task cache, so out-of-order events never index stale text
+
+Queries intersect the term sets weighted by IDF (ZINTERSTORE) and page through
+the ranked result inside one script.
+"""
+import math
+import re
+import uuid
+from collections import Counter
+from typing import Iterable, Iterator, List, Tuple
+from app.cache import redis_cache
+
+SEARCH_VERSIONS_KEY = "search:versions"
+SEARCH_DOCS_KEY = "search:docs"
+SEARCH_KEY_PATTERN = "search:*"
+# Title matches count more than description matches
+TITLE_WEIGHT = 3
+DESCRIPTION_WEIGHT = 1
+MAX_QUERY_TOKENS = 8
+MAX_TOKEN_LENGTH = 64
+
+_TOKEN_RE = re.compile(r"\w+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by for from in is it of on or that the this to was were will with".split()
+)
+
+# KEYS[1] versions hash, KEYS[2] docs set
+# ARGV per change: op ('u' index if newer, 'r' reindex if not older, 'd' remove if newer),
+#   id, version, terms ("token=score token=score ...", '' for deletes)
+_APPLY_SEARCH_LUA = """
+for i = 1, #ARGV, 4 do
+    local op, id, version, terms = ARGV[i], ARGV[i + 1], tonumber(ARGV[i + 2]), ARGV[i + 3]
+    local current = tonumber(redis.call('HGET', KEYS[1], id) or 0)
+    if version > current or (op == 'r' and version == current) then
+        redis.call('HSET', KEYS[1], id, version)
+        local doc = 'search:doc:' .. id
+        for _, token in ipairs(redis.call('HKEYS', doc)) do
+            redis.call('ZREM', 'search:term:' .. token, id)
+        end
+        redis.call('DEL', doc)
+        if op == 'd' then
+            redis.call('SREM', KEYS[2], id)
+        else
+            redis.call('SADD', KEYS[2], id)
+            for token, score in string.gmatch(terms, '(%S+)=(%S+)') do
+                redis.call('ZADD', 'search:term:' .. token, score, id)
+                redis.call('HSET', doc, token, score)
+            end
+        end
+    end
+end
+return 0
+"""
+
+# KEYS[1] scratch key for the ranked result, KEYS[2] docs set
+# ARGV[1] offset, ARGV[2] limit, ARGV[3..] query tokens. Returns {total, {id, score, ...}}
+_SEARCH_LUA = """
+local n = redis.call('SCARD', KEYS[2])
+local args = {KEYS[1], #ARGV - 2}
+local weights = {'WEIGHTS'}
+for i = 3, #ARGV do
+    local key = 'search:term:' .. ARGV[i]
+    local df = redis.call('ZCARD', key)
+    if df == 0 then
+        return {0, {}}
+    end
+    args[#args + 1] = key
+    weights[#weights + 1] = tostring(math.log(1 + n / df))
+end
+local offset, stop = tonumber(ARGV[1]), tonumber(ARGV[1]) + tonumber(ARGV[2]) - 1
+if #ARGV == 3 then
+    -- One term: the term set is already ranked, page it in place and scale by its IDF
+    local page = redis.call('ZREVRANGE', args[3], offset, stop, 'WITHSCORES')
+    for i = 2, #page, 2 do
+        page[i] = tostring(tonumber(page[i]) * tonumber(weights[2]))
+    end
+    return {redis.call('ZCARD', args[3]), page}
+end
+for _, weight in ipairs(weights) do
+    args[#args + 1] = weight
+end
+local total = redis.call('ZINTERSTORE', unpack(args))
+local page = redis.call('ZREVRANGE', KEYS[1], offset, stop, 'WITHSCORES')
+redis.call('DEL', KEYS[1])
+return {total, page}
+"""
+
+
+def tokenize(text: str) -> List[str]:
+    return [
+        token
+        for token in _TOKEN_RE.findall((text or "").lower())
+        if 1 < len(token) <= MAX_TOKEN_LENGTH and token not in _STOPWORDS
+    ]
+
+
+def query_tokens(q: str) -> List[str]:
+    """Distinct query tokens in order, capped at MAX_QUERY_TOKENS"""
+    return list(dict.fromkeys(tokenize(q)))[:MAX_QUERY_TOKENS]
+
+
+def _terms(task: dict) -> str:
+    weighted = Counter()
+    for token in tokenize(task.get("title")):
+        weighted[token] += TITLE_WEIGHT
+    for token in tokenize(task.get("description")):
+        weighted[token] += DESCRIPTION_WEIGHT
+    # Log-damped term frequency, so repeating a word has diminishing returns
+    return " ".join(f"{token}={1 + math.log(weight):.4f}" for token, weight in weighted.items())
+
+
+def _search_args(upserts: Iterable[dict], deletes: Iterable[Tuple[str, int]], op: str = "u") -> List:
+    args: List = []
+    for task in upserts:
+        args.extend((op, task["id"], task.get("version") or 1, _terms(task)))
+    for task_id, version in deletes:
+        args.extend(("d", task_id, version, ""))
+    return args
+
+
+_sync_apply_search = redis_cache._sync_client.register_script(_APPLY_SEARCH_LUA)
+_async_search = (
+    redis_cache._async_client.register_script(_SEARCH_LUA) if redis_cache._async_client else None
+)
+_async_apply_search = (
+    redis_cache._async_client.register_script(_APPLY_SEARCH_LUA) if redis_cache._async_client else None
+)
+
+
+_APPLY_SEARCH_KEYS = [SEARCH_VERSIONS_KEY, SEARCH_DOCS_KEY]
+
+
+def _apply_search_arg_chunks(upserts: List[dict], deletes: List[Tuple[str, int]], op: str) -> Iterator[List]:
+    """Script arguments for the changes, CACHE_PIPELINE_CHUNK_SIZE changes per call"""
+    for chunk in redis_cache._chunks(upserts):
+        yield _search_args(chunk, [], op)
+    for chunk in redis_cache._chunks(deletes):
+        yield _search_args([], chunk)
+
+
+def search_index_apply_sync(upserts: List[dict], deletes: List[Tuple[str, int]], op: str = "u") -> None:
+    """Version-guarded (re)indexing of projected changes, one pipelined round trip.
+    `op="r"` reindexes tasks whose version is already indexed (rebuilds)."""
+    if not upserts and not deletes:
+        return
+    pipe = redis_cache._sync_client.pipeline(transaction=False)
+    for args in _apply_search_arg_chunks(upserts, deletes, op):
+        _sync_apply_search(keys=_APPLY_SEARCH_KEYS, args=args, client=pipe)
+    pipe.execute()
+
+
+async def search_index_apply_async(upserts: List[dict], deletes: List[Tuple[str, int]], op: str = "u") -> None:
+    """search_index_apply_sync for the asyncio projector"""
+    if not redis_cache._async_client or (not upserts and not deletes):
+        return
+    pipe = redis_cache._async_client.pipeline(transaction=False)
+    for args in _apply_search_arg_chunks(upserts, deletes, op):
+        await _async_apply_search(keys=_APPLY_SEARCH_KEYS, args=args, client=pipe)
+    await pipe.execute()
+
+
+async def search_index_forget_versions_async(deletes: List[Tuple[str, int]]) -> int:
+    """Drop purged deletes from `search:versions`, unless a newer version was indexed since"""
+    return await redis_cache.cache_forget_versions_async(deletes, SEARCH_VERSIONS_KEY)
+
+
+def search_index_clear_sync() -> int:
+    """Delete every search key; returns how many were removed"""
+    client = redis_cache._sync_client
+    removed = 0
+    batch: List[str] = []
+    for key in client.scan_iter(match=SEARCH_KEY_PATTERN, count=1000):
+        batch.append(key)
+        if len(batch) >= redis_cache.CACHE_PIPELINE_CHUNK_SIZE:
+            removed += client.delete(*batch)
+            batch = []
+    if batch:
+        removed += client.delete(*batch)
+    return removed
+
+
+async def search_async(tokens: List[str], offset: int, limit: int) -> Tuple[int, List[Tuple[str, float]]]:
+    """Tasks containing every token, best first; returns (total matches, [(id, score)])"""
+    client = redis_cache._async_client
+    if not client or not tokens:
+        return 0, []
+    scratch_key = f"search:tmp:{uuid.uuid4().hex}"
+    total, page = await _async_search(
+        keys=[scratch_key, SEARCH_DOCS_KEY],
+        args=[offset, limit, *tokens],
+        client=client,
+    )
+    return int(total), [(page[i], float(page[i + 1])) for i in range(0, len(page), 2)]
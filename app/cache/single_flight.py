@@ -0,0 +1,36 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# In-flight loads for this process, keyed by cache key
+_inflight: Dict[str, asyncio.Future] = {}
+
+
+async def single_flight(key: str, loader: Callable[[], Awaitable[T]]) -> T:
+    """Run `loader` once per key at a time; concurrent callers share its result"""
+    future = _inflight.get(key)
+    if future is not None:
+        logger.debug(f"Joining in-flight load for {key}")
+        return await asyncio.shield(future)
+
+    future = asyncio.get_running_loop().create_future()
+    _inflight[key] = future
+    try:
+        result = await loader()
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as e:
+        future.set_exception(e)
+        # Mark retrieved so a load nobody joined doesn't log "exception never retrieved"
+        future.exception()
+        raise
+    else:
+        future.set_result(result)
+        return result
+    finally:
+        _inflight.pop(key, None)
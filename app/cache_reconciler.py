@@ -0,0 +1,171 @@
+"""Background cache reconciler and startup warm-up (API process).
+
+`tasks:index` outlives the `task:{id}` keys (CACHE_TTL_SECONDS), so without help
+expired entries are repaired inline by whichever request finds them. Every
+CACHE_RECONCILE_INTERVAL_SECONDS one API process (a Redis lock elects it) walks
+the index with SSCAN, CACHE_RECONCILE_CHUNK_SIZE ids at a time, and per chunk:
+
+- evicts ids the read DB no longer has (checked on the primary, never a
+  lagging replica),
+- refills keys that expired or hold an older version than the read DB, with one
+  read DB query and the pipelined, version-guarded cache refill,
+- renews the TTL of hot keys (read within CACHE_RECONCILE_HOT_IDLE_SECONDS) that
+  would expire before the next pass. Where Redis does not track idle time (LFU
+  maxmemory policy) every such key counts as hot.
+
+The same process then purges delete versions older than
+TOMBSTONE_RETENTION_SECONDS from `task_tombstones`, `tasks:versions` and
+`search:versions`, which would otherwise grow with every delete. The horizon never passes the oldest
+pending outbox event, so only events redelivered after it (Celery retries, the
+streams projector) could still recreate a purged task.
+
+`warm_cache` runs once at startup, before the API takes traffic: a full fill if
+the list snapshot is not built yet, otherwise one reconcile pass.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, List
+from sqlalchemy import delete, select
+from app.cache.redis_cache import (
+    cache_add_tasks_async,
+    cache_count_tasks_async,
+    cache_forget_versions_async,
+    cache_inspect_tasks_async,
+    cache_remove_tasks_async,
+    cache_renew_tasks_async,
+    cache_scan_index_async,
+    cache_try_lock_async,
+)
+from app.cache.search_index import search_index_forget_versions_async
+from app.config.settings import settings
+from app.db.models import OutboxEvent, Task, TaskTombstone
+from app.db.read_db import async_read_primary_session
+from app.db.write_db import async_write_session
+from app.metrics import cache_reconciled, tombstones_purged
+from app.serialization import task_to_dict
+
+logger = logging.getLogger(__name__)
+
+RECONCILE_LOCK = "cache:reconcile"
+
+
+async def _reconcile_chunk(task_ids: List[str], stats: Dict[str, int]) -> None:
+    inspected = await cache_inspect_tasks_async(task_ids)
+    async with async_read_primary_session() as session:
+        result = await session.execute(select(Task.id, Task.version).where(Task.id.in_(task_ids)))
+        db_versions = dict(result.all())
+
+    renew_below = settings.CACHE_RECONCILE_INTERVAL_SECONDS * 2
+    evict, refill, renew = [], [], []
+    for task_id, (ttl, idle, cached_version) in zip(task_ids, inspected):
+        db_version = db_versions.get(task_id)
+        if db_version is None:
+            evict.append(task_id)
+        elif ttl == -2 or cached_version < db_version:
+            refill.append(task_id)
+        elif 0 <= ttl < renew_below and (idle is None or idle < settings.CACHE_RECONCILE_HOT_IDLE_SECONDS):
+            renew.append(task_id)
+
+    if evict:
+        await cache_remove_tasks_async(evict)
+    if refill:
+        async with async_read_primary_session() as session:
+            result = await session.execute(select(Task).where(Task.id.in_(refill)))
+            await cache_add_tasks_async([task_to_dict(task) for task in result.scalars().all()])
+    if renew:
+        await cache_renew_tasks_async(renew)
+    for action, ids in (("evicted", evict), ("refilled", refill), ("renewed", renew)):
+        if ids:
+            stats[action] += len(ids)
+            cache_reconciled.inc(action, amount=len(ids))
+    stats["scanned"] += len(task_ids)
+
+
+async def reconcile_once(chunk_size: int = settings.CACHE_RECONCILE_CHUNK_SIZE) -> Dict[str, int]:
+    """One full SSCAN pass over the index; returns counts per action"""
+    stats = {"scanned": 0, "evicted": 0, "refilled": 0, "renewed": 0}
+    cursor = 0
+    while True:
+        cursor, task_ids = await cache_scan_index_async(cursor, chunk_size)
+        if task_ids:
+            await _reconcile_chunk(task_ids, stats)
+        if cursor == 0:
+            return stats
+
+
+async def _purge_cutoff() -> datetime:
+    cutoff = datetime.utcnow() - timedelta(seconds=settings.TOMBSTONE_RETENTION_SECONDS)
+    # An event still in the outbox may predate a delete; keep that delete until it is published
+    async with async_write_session() as session:
+        result = await session.execute(select(OutboxEvent.created_at).order_by(OutboxEvent.id).limit(1))
+        oldest_pending = result.scalar()
+    return min(cutoff, oldest_pending) if oldest_pending else cutoff
+
+
+async def purge_tombstones_once(chunk_size: int = settings.TOMBSTONE_PURGE_CHUNK_SIZE) -> int:
+    """Forget deletes past the retention horizon, in Redis then in the read DB; returns how many"""
+    cutoff = await _purge_cutoff()
+    purged = 0
+    while True:
+        async with async_read_primary_session() as session:
+            result = await session.execute(
+                select(TaskTombstone.id, TaskTombstone.version)
+                .where(TaskTombstone.deleted_at < cutoff)
+                .limit(chunk_size)
+            )
+            expired = [tuple(row) for row in result.all()]
+        if not expired:
+            return purged
+        await cache_forget_versions_async(expired)
+        await search_index_forget_versions_async(expired)
+        async with async_read_primary_session() as session:
+            async with session.begin():
+                await session.execute(
+                    delete(TaskTombstone).where(
+                        TaskTombstone.id.in_([task_id for task_id, _ in expired]),
+                        TaskTombstone.deleted_at < cutoff,
+                    )
+                )
+        purged += len(expired)
+        tombstones_purged.inc(amount=len(expired))
+
+
+async def run_reconciler() -> None:
+    """Reconcile (and purge expired tombstones) forever; the lock (held for one
+    interval, never released) keeps passes to one per interval across all API processes"""
+    interval = settings.CACHE_RECONCILE_INTERVAL_SECONDS
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            if await cache_try_lock_async(RECONCILE_LOCK, ttl_ms=int(interval * 1000)) is None:
+                continue
+            stats = await reconcile_once()
+            if settings.TOMBSTONE_RETENTION_SECONDS > 0:
+                stats["tombstones_purged"] = await purge_tombstones_once()
+            logger.debug("Cache reconcile pass: %s", stats)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Cache reconcile pass failed: {e}")
+
+
+async def _warm() -> str:
+    from app.services.task_service import TaskService
+
+    if await cache_count_tasks_async() is None:
+        # No snapshot yet (fresh or flushed Redis): one locked full fill for all processes
+        tasks = await TaskService.get_all_tasks()
+        return f"full fill, {len(tasks)} tasks"
+    return f"reconcile pass, {await reconcile_once()}"
+
+
+async def warm_cache() -> None:
+    """Fill the cache before serving; gives up after CACHE_WARM_TIMEOUT_SECONDS"""
+    try:
+        outcome = await asyncio.wait_for(_warm(), settings.CACHE_WARM_TIMEOUT_SECONDS)
+        logger.info(f"Cache warmed ({outcome})")
+    except asyncio.TimeoutError:
+        logger.warning(f"Cache warm-up did not finish in {settings.CACHE_WARM_TIMEOUT_SECONDS}s, serving anyway")
+    except Exception as e:
+        logger.warning(f"Cache warm-up failed, serving anyway: {e}")
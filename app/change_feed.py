@@ -0,0 +1,184 @@
+"""Server-sent change feed (GET /v1/tasks/changes).
+
+The cache apply script gives every projected create, update and delete a
+sequence number, appends it to the capped `tasks:changes` stream
+(CHANGE_FEED_MAX_LEN entries) and publishes it on the `tasks:changes` channel.
+Each API process holds one subscription to that channel (`run_change_feed`) and
+fans events out to its clients; an event is decoded and framed once per process,
+whatever the number of clients.
+
+- Backpressure: each client has a buffer of CHANGE_FEED_CLIENT_BUFFER events. A
+  client that falls that far behind is disconnected rather than slowing the
+  fan-out or growing memory; it reconnects with Last-Event-ID and catches up
+  from the stream.
+- Resume: with Last-Event-ID (or `?after=`) the events since that sequence
+  number are replayed from the stream before live ones. If some were trimmed,
+  a `reset` event tells the client to reload the list instead.
+- An idle client is a parked coroutine and an empty queue. A comment line every
+  CHANGE_FEED_HEARTBEAT_SECONDS keeps proxies from closing the connection, and
+  streams end after CHANGE_FEED_MAX_CONNECTION_SECONDS (clients resume
+  seamlessly), so restarts and rebalancing never wait on them for long.
+"""
+import asyncio
+import logging
+from typing import AsyncIterator, List, Optional, Set, Tuple
+from app.cache import redis_cache
+from app.cache.redis_cache import CHANGE_FEED_CHANNEL, cache_get_change_seq_async, cache_read_changes_async
+from app.config.settings import settings
+from app.metrics import change_feed_dropped_clients, change_feed_events, change_feed_resumes
+from app.serialization import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+Frame = Tuple[int, bytes]  # (seq, encoded SSE frame)
+
+_HEARTBEAT = b": keep-alive\n\n"
+
+
+def _frame(seq: int, event_type: str, data: str) -> bytes:
+    return f"id: {seq}\nevent: {event_type}\ndata: {data}\n\n".encode()
+
+
+def _event_frame(event_json: str) -> Frame:
+    event = loads(event_json)
+    return event["seq"], _frame(event["seq"], event["type"], event_json)
+
+
+def _control_frame(event_type: str, seq: int) -> Frame:
+    return seq, _frame(seq, event_type, dumps({"seq": seq}).decode())
+
+
+class _Client:
+    __slots__ = ("queue", "dropped")
+
+    def __init__(self, buffer_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=buffer_size)
+        self.dropped = False
+
+
+class ChangeFeed:
+    """Fans change events out from the process's subscription to its SSE clients"""
+
+    def __init__(self, buffer_size: int = settings.CHANGE_FEED_CLIENT_BUFFER):
+        self.buffer_size = buffer_size
+        self._clients: Set[_Client] = set()
+        # Last seq received; after a resubscribe the gap is replayed from the stream
+        self.last_seq: Optional[int] = None
+
+    @property
+    def client_count(self) -> int:
+        return len(self._clients)
+
+    def add_client(self) -> _Client:
+        client = _Client(self.buffer_size)
+        self._clients.add(client)
+        return client
+
+    def remove_client(self, client: _Client) -> None:
+        self._clients.discard(client)
+
+    def publish(self, frames: List[Frame]) -> None:
+        if self.last_seq is not None:
+            frames = [frame for frame in frames if frame[0] > self.last_seq]
+        if not frames:
+            return
+        self.last_seq = frames[-1][0]
+        change_feed_events.inc(amount=len(frames))
+        for client in list(self._clients):
+            for frame in frames:
+                try:
+                    client.queue.put_nowait(frame)
+                except asyncio.QueueFull:
+                    # Too slow: disconnect it rather than buffer without bound
+                    client.dropped = True
+                    self._clients.discard(client)
+                    change_feed_dropped_clients.inc()
+                    break
+
+
+change_feed = ChangeFeed()
+
+
+async def _replay(after_seq: int) -> AsyncIterator[List[Frame]]:
+    """Pages of events after `after_seq` from the stream, or a single `reset`
+    frame if some of them are gone (trimmed, or Redis lost the feed)"""
+    latest = await cache_get_change_seq_async() or 0
+    if latest == after_seq:
+        return
+    chunk_size = settings.CHANGE_FEED_REPLAY_CHUNK_SIZE
+    page = await cache_read_changes_async(after_seq, chunk_size) if latest > after_seq else []
+    if not page or page[0][0] != after_seq + 1:
+        change_feed_resumes.inc("reset")
+        yield [_control_frame("reset", latest)]
+        return
+    change_feed_resumes.inc("replayed")
+    while page:
+        yield [_event_frame(data) for _, data in page]
+        if len(page) < chunk_size:
+            return
+        page = await cache_read_changes_async(page[-1][0], chunk_size)
+
+
+async def stream_changes(after_seq: Optional[int] = None) -> AsyncIterator[bytes]:
+    """SSE body for one client: replayed events after `after_seq`, then live ones"""
+    client = change_feed.add_client()
+    try:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.CHANGE_FEED_MAX_CONNECTION_SECONDS
+        yield f"retry: {settings.CHANGE_FEED_RETRY_MS}\n\n".encode()
+        if after_seq is None:
+            # Gives a fresh client an id to resume from, even if nothing changes before it reconnects
+            last_sent, frame = _control_frame("ready", await cache_get_change_seq_async() or 0)
+            yield frame
+        else:
+            last_sent = after_seq
+            async for frames in _replay(after_seq):
+                for seq, frame in frames:
+                    last_sent = seq
+                    yield frame
+
+        queue = client.queue
+        while not client.dropped:
+            timeout = min(settings.CHANGE_FEED_HEARTBEAT_SECONDS, deadline - loop.time())
+            if timeout <= 0:
+                return
+            frames = []
+            if queue.empty():
+                try:
+                    frames.append(await asyncio.wait_for(queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    yield _HEARTBEAT
+                    continue
+            # Everything buffered goes out in one write; events the replay already sent are skipped
+            frames.extend(queue.get_nowait() for _ in range(queue.qsize()))
+            chunk = b"".join(frame for seq, frame in frames if seq > last_sent)
+            last_sent = max(last_sent, frames[-1][0])
+            if chunk:
+                yield chunk
+    finally:
+        change_feed.remove_client(client)
+
+
+async def run_change_feed() -> None:
+    """Follow CHANGE_FEED_CHANNEL for the API's lifetime and fan events out to clients"""
+    client = redis_cache._async_client
+    if not client:
+        return
+    while True:
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(CHANGE_FEED_CHANNEL)
+            if change_feed.last_seq is not None:
+                # Events published while we were not subscribed
+                async for frames in _replay(change_feed.last_seq):
+                    change_feed.publish(frames)
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    change_feed.publish([_event_frame(line) for line in message["data"].split("\n")])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Change feed listener error, resubscribing: {e}")
+            await asyncio.sleep(1)
+        finally:
+            await pubsub.aclose()
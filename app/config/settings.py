@@ -1,4 +1,6 @@
+import logging
 import os
+from pydantic import field_validator
 from pydantic_settings import BaseSettings
 
 
@@ -10,10 +12,122 @@ class Settings(BaseSettings):
     PROJECT_NAME: str = "CQRS Task Management API"
     VERSION: str = "1.0.0"
     
+    # Task listing (keyset pagination / streaming)
+    TASKS_PAGE_DEFAULT_LIMIT: int = 100
+    TASKS_PAGE_MAX_LIMIT: int = 1000
+    TASKS_STREAM_CHUNK_SIZE: int = 500
     
+    # Cache warm-up at API startup and background reconciler (app.cache_reconciler)
+    CACHE_WARM_ON_STARTUP: bool = True
+    CACHE_WARM_TIMEOUT_SECONDS: float = 30.0
+    CACHE_RECONCILE_ENABLED: bool = True
+    CACHE_RECONCILE_INTERVAL_SECONDS: float = 30.0
+    CACHE_RECONCILE_CHUNK_SIZE: int = 1000
+    CACHE_RECONCILE_HOT_IDLE_SECONDS: int = 120
+    
+    # Delete versions (read DB task_tombstones, Redis tasks:versions) are purged by the
+    # reconciler after this long, and never while an older outbox event is pending. Keep
+    # it well above the longest redelivery window (Celery retries span about an hour with
+    # the PROJECTION_* defaults); later events for a purged task recreate it. 0 keeps them.
+    TOMBSTONE_RETENTION_SECONDS: int = 86400
+    TOMBSTONE_PURGE_CHUNK_SIZE: int = 1000
+    
+    # Read replica routing (app.db.read_router; replica URLs: READ_DB_REPLICA_URLS)
+    READ_ROUTER_CHECK_INTERVAL_SECONDS: float = 2.0
+    READ_ROUTER_CHECK_TIMEOUT_SECONDS: float = 1.0
+    READ_REPLICA_MAX_LAG_SECONDS: float = 5.0
+    # Also send reads to the read DB primary while replicas are available
+    READ_ROUTER_INCLUDE_PRIMARY: bool = False
+    
+    # Change feed (GET /v1/tasks/changes, app.change_feed); events kept for replay: CHANGE_FEED_MAX_LEN
+    CHANGE_FEED_CLIENT_BUFFER: int = 1000
+    CHANGE_FEED_HEARTBEAT_SECONDS: float = 15.0
+    CHANGE_FEED_REPLAY_CHUNK_SIZE: int = 1000
+    # Streams end after this long and clients resume from their last event id
+    CHANGE_FEED_MAX_CONNECTION_SECONDS: float = 300.0
+    # Reconnect delay sent to EventSource clients
+    CHANGE_FEED_RETRY_MS: int = 1000
+    
+    # Read-your-writes: how long GET /v1/tasks/{id}?min_version= waits for the
+    # projector before falling back to the write DB
+    CONSISTENCY_WAIT_MS: int = 500
+    
+    # Batch command endpoints (/v1/tasks/batch)
+    TASK_BATCH_MAX_CREATE: int = 1000
+    TASK_BATCH_MAX_UPDATE: int = 1000
+    TASK_BATCH_MAX_DELETE: int = 1000
+    
+    # Search (GET /v1/tasks/search, app.search_rebuild)
+    SEARCH_DEFAULT_LIMIT: int = 20
+    SEARCH_MAX_LIMIT: int = 100
+    SEARCH_MAX_OFFSET: int = 10000
+    SEARCH_REBUILD_CHUNK_SIZE: int = 1000
+    
+    # Outbox relay (app.outbox_relay); OUTBOX_PUBLISHER is "celery" (sync_task_events
+    # for the Celery worker) or "stream" (PROJECTOR_STREAM for app.projector)
+    OUTBOX_BATCH_SIZE: int = 500
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 0.2
+    OUTBOX_PUBLISHER: str = "celery"
+    
+    # In-process publisher of committed outbox events (app.event_publisher, API process);
+    # the relay publishes whatever it does not. EVENT_PUBLISHER_OVERFLOW, when the queue
+    # is full: "relay" (leave the events to the relay) or "wait" (the request waits for room)
+    EVENT_PUBLISHER_ENABLED: bool = True
+    EVENT_PUBLISHER_QUEUE_SIZE: int = 10000
+    EVENT_PUBLISHER_BATCH_SIZE: int = 500
+    EVENT_PUBLISHER_FLUSH_INTERVAL_MS: float = 5.0
+    EVENT_PUBLISHER_OVERFLOW: str = "relay"
+    EVENT_PUBLISHER_DRAIN_TIMEOUT_SECONDS: float = 5.0
+    # With the publisher enabled the relay only takes events older than this (left behind by the API)
+    EVENT_PUBLISHER_RELAY_GRACE_MS: int = 1000
+    
+    # Event loop lag sampling (event_loop_lag_seconds on /metrics)
+    EVENT_LOOP_LAG_INTERVAL_SECONDS: float = 0.25
+    
+    # Redis Streams projector (app.projector)
+    PROJECTOR_STREAM: str = "tasks:events"
+    PROJECTOR_GROUP: str = "projector"
+    PROJECTOR_DEAD_LETTER_STREAM: str = "tasks:events:dead"
+    PROJECTOR_BATCH_SIZE: int = 500
+    PROJECTOR_BLOCK_MS: int = 1000
+    # Pending entries idle this long (consumer crashed or batch failed) are claimed again
+    PROJECTOR_CLAIM_IDLE_MS: int = 30000
+    # Entries delivered this many times go to the dead-letter stream
+    PROJECTOR_MAX_DELIVERIES: int = 5
+    
+    # Read-side projection (app.projection)
+    PROJECTION_MAX_BATCH_SIZE: int = 1000
+    # Celery projection retries (app.tasks): a failed batch is retried with exponential
+    # backoff capped at PROJECTION_RETRY_BACKOFF_MAX_SECONDS, then fails for good
+    PROJECTION_MAX_RETRIES: int = 20
+    PROJECTION_RETRY_BACKOFF_MAX_SECONDS: int = 300
+    
+    # Read model rebuild (app.rebuild): rows per chunk and chunks loaded in parallel
+    REBUILD_CHUNK_SIZE: int = 5000
+    REBUILD_CONCURRENCY: int = 4
     
     # Logging
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    # Hand records to a background thread (QueueHandler) so request handlers never block on I/O
+    LOG_ASYNC: bool = True
+    # Access log: "all", "sampled" (ACCESS_LOG_SAMPLE_RATE of requests), "slow" or "off";
+    # "sampled" and "slow" always log requests slower than ACCESS_LOG_SLOW_MS and 5xx responses
+    ACCESS_LOG_MODE: str = "sampled"
+    ACCESS_LOG_SAMPLE_RATE: float = 0.01
+    ACCESS_LOG_SLOW_MS: float = 500.0
+    # Level of per-task log lines in TaskService and app.tasks (hot paths; DEBUG = off at INFO)
+    TASK_LOG_LEVEL: str = "DEBUG"
+    # SQLAlchemy echo on the async engines (logs every statement)
+    SQL_ECHO: bool = False
+    
+    @field_validator("LOG_LEVEL", "TASK_LOG_LEVEL")
+    @classmethod
+    def _valid_log_level(cls, value: str) -> str:
+        # Fail at startup, not on every logged write ("info" -> "INFO")
+        level = value.strip().upper()
+        if not isinstance(logging.getLevelName(level), int):
+            raise ValueError(f"unknown log level {value!r}")
+        return level
     
     class Config:
         env_file = ".env"
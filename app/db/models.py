@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, String, Boolean, DateTime
+from sqlalchemy import Column, String, Boolean, DateTime, Index, BigInteger, Integer, JSON
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
@@ -12,7 +12,52 @@ class Task(Base):
     description = Column(String)
     is_completed = Column(Boolean, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Bumped by every write; projections only apply newer versions
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+    __table_args__ = (
+        # Keyset pagination order for GET /v1/tasks: (created_at, id)
+        Index("ix_tasks_created_at_id", "created_at", "id"),
+        # Filtered listing/count: is_completed first, then the same keyset order
+        Index("ix_tasks_is_completed_created_at_id", "is_completed", "created_at", "id"),
+        # Title prefix filter (LIKE 'abc%'); text_pattern_ops so Postgres uses it in any collation
+        Index("ix_tasks_title_prefix", "title", postgresql_ops={"title": "text_pattern_ops"}),
+    )
+
+    def __repr__(self):
+        return f"<Task(id={self.id}, title={self.title}, is_completed={self.is_completed}, version={self.version})>"
+
+
+class TaskTombstone(Base):
+    """Read-side record of deleted tasks so late, older events cannot resurrect them"""
+    __tablename__ = "task_tombstones"
+
+    id = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False)
+    deleted_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        # Purge of tombstones past TOMBSTONE_RETENTION_SECONDS (app.cache_reconciler)
+        Index("ix_task_tombstones_deleted_at", "deleted_at"),
+    )
+
+
+class OutboxEvent(Base):
+    """Write-side transactional outbox, drained by app.outbox_relay"""
+    __tablename__ = "outbox"
+
+    # BIGSERIAL on Postgres; SQLite only autoincrements INTEGER primary keys
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    event_type = Column(String, nullable=False)  # created | updated | deleted
+    task_id = Column(String, nullable=False)
+    payload = Column(JSON)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
 
     def __repr__(self):
-        return f"<Task(id={self.id}, title={self.title}, is_completed={self.is_completed})>"
+        return f"<OutboxEvent(id={self.id}, event_type={self.event_type}, task_id={self.task_id})>"
+
+
+# Tables created in each database by init_db.py
+WRITE_MODEL_TABLES = [Task.__table__, OutboxEvent.__table__]
+READ_MODEL_TABLES = [Task.__table__, TaskTombstone.__table__]
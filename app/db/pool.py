@@ -0,0 +1,17 @@
+import time
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.metrics import db_pool_checkout_wait
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records checkout wait in `db_pool_checkout_wait_seconds`.
+
+    The pool label is the engine's `pool_logging_name`.
+    """
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            db_pool_checkout_wait.observe(time.perf_counter() - start, self._orig_logging_name or "default")
@@ -0,0 +1,145 @@
+"""Routes read-side sessions across read replicas.
+
+Each target (the read DB primary and every replica) has its own engine and pool.
+A session goes to the available replica with the fewest outstanding sessions
+per unit of weight; with no replica available (none configured, all unhealthy
+or lagging) it goes to the primary.
+
+A replica leaves the rotation when a health check fails or times out, when a
+session on it hits a connection error, or when its replication lag exceeds
+READ_REPLICA_MAX_LAG_SECONDS. It comes back on the next successful check
+(every READ_ROUTER_CHECK_INTERVAL_SECONDS, run by the API lifespan).
+"""
+import asyncio
+import logging
+import random
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from app.config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Seconds behind the primary; 0 when every received WAL record has been replayed
+# (an idle primary would otherwise look like growing lag)
+_PG_REPLICATION_LAG_SQL = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() "
+    "THEN 0 ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class ReadTarget:
+    def __init__(self, name: str, engine: AsyncEngine, weight: float = 1.0):
+        self.name = name
+        self.engine = engine
+        self.weight = weight
+        self.session_factory = sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+        self.outstanding = 0
+        self.healthy = True
+        self.lag_seconds = 0.0
+        self.routed = 0
+
+    def available(self, max_lag_seconds: float) -> bool:
+        return self.healthy and self.lag_seconds <= max_lag_seconds
+
+    async def replication_lag(self) -> float:
+        async with self.engine.connect() as conn:
+            if conn.dialect.name == "postgresql":
+                return float((await conn.execute(_PG_REPLICATION_LAG_SQL)).scalar() or 0)
+            await conn.execute(text("SELECT 1"))
+            return 0.0
+
+
+class ReadRouter:
+    def __init__(self, primary: ReadTarget, replicas: List[ReadTarget], include_primary: bool = False):
+        self.primary = primary
+        self.replicas = replicas
+        self.include_primary = include_primary
+
+    @property
+    def targets(self) -> List[ReadTarget]:
+        return [self.primary, *self.replicas]
+
+    def pick(self) -> ReadTarget:
+        """Least outstanding sessions per unit of weight among available replicas"""
+        max_lag = settings.READ_REPLICA_MAX_LAG_SECONDS
+        candidates = [replica for replica in self.replicas if replica.available(max_lag)]
+        if self.include_primary or not candidates:
+            candidates.append(self.primary)
+        if len(candidates) == 1:
+            return candidates[0]
+        # Random tie-break so idle replicas share the load
+        return min(candidates, key=lambda target: ((target.outstanding + 1) / target.weight, random.random()))
+
+    def mark_down(self, target: ReadTarget, reason: str) -> None:
+        if target is self.primary or not target.healthy:
+            return
+        target.healthy = False
+        logger.warning(f"Read replica {target.name} out of rotation: {reason}")
+
+    @asynccontextmanager
+    async def session(self) -> AsyncIterator[AsyncSession]:
+        target = self.pick()
+        target.outstanding += 1
+        target.routed += 1
+        try:
+            async with target.session_factory() as session:
+                yield session
+        except DBAPIError as e:
+            if e.connection_invalidated or isinstance(e, (OperationalError, InterfaceError)):
+                self.mark_down(target, str(e.orig or e))
+            raise
+        finally:
+            target.outstanding -= 1
+
+    async def check(self, target: ReadTarget) -> None:
+        try:
+            lag = await asyncio.wait_for(target.replication_lag(), settings.READ_ROUTER_CHECK_TIMEOUT_SECONDS)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.mark_down(target, f"health check failed: {e!r}")
+            return
+        target.lag_seconds = lag
+        if lag > settings.READ_REPLICA_MAX_LAG_SECONDS:
+            logger.warning(f"Read replica {target.name} is {lag:.1f}s behind, skipped until it catches up")
+        elif not target.healthy:
+            logger.info(f"Read replica {target.name} back in rotation")
+        target.healthy = True
+
+    async def check_all(self) -> None:
+        await asyncio.gather(*[self.check(replica) for replica in self.replicas])
+
+    async def run_health_checks(self) -> None:
+        """Check every replica each READ_ROUTER_CHECK_INTERVAL_SECONDS (API lifespan)"""
+        if not self.replicas:
+            return
+        while True:
+            await self.check_all()
+            await asyncio.sleep(settings.READ_ROUTER_CHECK_INTERVAL_SECONDS)
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+
+def parse_weights(raw: str, count: int) -> List[float]:
+    """Comma-separated weights, one per replica; missing ones default to 1"""
+    weights = [float(value) for value in raw.split(",") if value.strip()] if raw else []
+    if any(weight <= 0 for weight in weights):
+        raise ValueError("READ_DB_REPLICA_WEIGHTS must be positive")
+    return (weights + [1.0] * count)[:count]
+
+
+def build_targets(urls: List[str], weights: List[float], engine_factory) -> List[ReadTarget]:
+    return [
+        ReadTarget(f"replica-{i + 1}", engine_factory(url, f"read-replica-{i + 1}"), weight)
+        for i, (url, weight) in enumerate(zip(urls, weights))
+    ]
+
+
+def replica_urls(raw: Optional[str]) -> List[str]:
+    return [url.strip() for url in (raw or "").split(",") if url.strip()]
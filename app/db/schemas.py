@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
 
 
@@ -15,13 +15,45 @@ class TaskOut(BaseModel):
     description: str
     is_completed: bool
     created_at: datetime
+    updated_at: Optional[datetime] = None
+    version: int = 1
 
     class Config:
         from_attributes = True  # Enables ORM conversion
 
 
+class TaskFilters(BaseModel):
+    is_completed: Optional[bool] = None
+    created_after: Optional[datetime] = None  # exclusive
+    created_before: Optional[datetime] = None  # exclusive
+    title_prefix: Optional[str] = None
+
+    def is_empty(self) -> bool:
+        return self.is_completed is None and self.status_only()
+
+    def status_only(self) -> bool:
+        """True when no filter besides is_completed is set (servable from Redis)"""
+        return self.created_after is None and self.created_before is None and not self.title_prefix
+
+
 class TaskUpdateRequest(BaseModel):
     title: str | None = None
     description: str | None = None
     is_completed: bool | None = None
 
+
+
+class TaskBatchUpdateItem(TaskUpdateRequest):
+    id: str
+
+
+class TaskBatchDeleteRequest(BaseModel):
+    ids: List[str]
+
+
+class TaskBatchItemResult(BaseModel):
+    index: int
+    id: str
+    status: str  # created | updated | deleted | not_found
+    task: Optional[dict] = None
+    version: Optional[int] = None  # consistency token of a delete
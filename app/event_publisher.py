@@ -0,0 +1,114 @@
+"""In-process publisher of committed outbox events (API process).
+
+Write handlers record their events in the outbox inside the write transaction.
+After the commit they hand the new outbox ids to `event_publisher.enqueue`,
+which only puts them in a bounded in-process queue. A background task collects
+ids for EVENT_PUBLISHER_FLUSH_INTERVAL_MS (or until EVENT_PUBLISHER_BATCH_SIZE are
+queued) and publishes them the way the relay does: rows locked with FOR UPDATE
+SKIP LOCKED, one broker message or pipelined XADD per batch, rows deleted in the
+same transaction. Projection starts within milliseconds of the commit instead of
+the next relay poll, and no broker call runs on the request path.
+
+The outbox stays the source of truth, so nothing here can lose an event: rows the
+relay took first are skipped, and ids that do not fit the queue (overflow policy
+"relay"), fail to publish or are still queued when the drain at shutdown times out
+are left to the relay.
+"""
+import asyncio
+import logging
+from typing import List, Optional
+from app.config.settings import settings
+from app.metrics import event_publisher_events
+from app.outbox_relay import drain_once
+
+logger = logging.getLogger(__name__)
+
+
+class EventPublisher:
+    def __init__(
+        self,
+        queue_size: int = settings.EVENT_PUBLISHER_QUEUE_SIZE,
+        batch_size: int = settings.EVENT_PUBLISHER_BATCH_SIZE,
+        flush_interval_ms: float = settings.EVENT_PUBLISHER_FLUSH_INTERVAL_MS,
+        overflow: str = settings.EVENT_PUBLISHER_OVERFLOW,
+    ):
+        if overflow not in ("relay", "wait"):
+            raise ValueError("EVENT_PUBLISHER_OVERFLOW must be 'relay' or 'wait'")
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self.overflow = overflow
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def enqueue(self, event_ids: List[int]) -> None:
+        """Queue committed outbox ids for publishing; never waits on the broker"""
+        queue = self._queue
+        if not self.running:
+            return
+        for i, event_id in enumerate(event_ids):
+            if self.overflow == "wait":
+                await queue.put(event_id)
+                continue
+            try:
+                queue.put_nowait(event_id)
+            except asyncio.QueueFull:
+                event_publisher_events.inc("overflow", amount=len(event_ids) - i)
+                return
+
+    async def _flush(self, event_ids: List[int]) -> None:
+        try:
+            published = await drain_once(len(event_ids), event_ids=event_ids)
+        except Exception as e:
+            logger.warning(f"Publishing {len(event_ids)} outbox events failed, left to the relay: {e}")
+            event_publisher_events.inc("failed", amount=len(event_ids))
+            return
+        event_publisher_events.inc("published", amount=published)
+        if published < len(event_ids):
+            event_publisher_events.inc("relayed", amount=len(event_ids) - published)
+
+    async def _run(self) -> None:
+        queue = self._queue
+        while True:
+            first = await queue.get()
+            # Collection window, unless a full batch is already waiting
+            if queue.qsize() + 1 < self.batch_size:
+                await asyncio.sleep(self.flush_interval)
+            batch = [first] + [queue.get_nowait() for _ in range(min(queue.qsize(), self.batch_size - 1))]
+            try:
+                await self._flush(batch)
+            finally:
+                for _ in batch:
+                    queue.task_done()
+
+    def start(self) -> None:
+        # Created here so the queue belongs to the running event loop
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = settings.EVENT_PUBLISHER_DRAIN_TIMEOUT_SECONDS) -> None:
+        """Publish what is queued (up to `timeout` seconds), then stop; the rest is left to the relay"""
+        if not self._task:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Event publisher drain timed out, {self._queue.qsize()} events left to the relay")
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        unflushed = self._queue.qsize()
+        if unflushed:
+            event_publisher_events.inc("unflushed", amount=unflushed)
+        self._queue = None
+
+
+event_publisher = EventPublisher()
@@ -0,0 +1,28 @@
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from app.config.settings import settings
+
+
+def setup_logging() -> None:
+    """Configure root logging for the API.
+
+    With LOG_ASYNC the root logger only enqueues records (QueueHandler); a
+    QueueListener thread formats and writes them, so the event loop never waits
+    on stderr. The listener is flushed and stopped at interpreter exit.
+    """
+    level = getattr(logging, settings.LOG_LEVEL)
+    if not settings.LOG_ASYNC:
+        logging.basicConfig(level=level)
+        return
+    stream = logging.StreamHandler()
+    stream.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+    records: queue.SimpleQueue = queue.SimpleQueue()
+    listener = QueueListener(records, stream, respect_handler_level=True)
+    handler = QueueHandler(records)
+    # prepare() merges args into the message here; the listener adds level/name once
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logging.basicConfig(level=level, handlers=[handler], force=True)
+    listener.start()
+    atexit.register(listener.stop)
@@ -1,22 +1,62 @@
+import asyncio
 import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from app.routes.index import routers
 from app.middleware.logging_middleware import LoggingMiddleware
+from app.middleware.metrics_middleware import MetricsMiddleware
 from app.config.settings import settings
+from app.logging_config import setup_logging
+from app.cache.redis_cache import l1_cache, run_invalidation_listener
+from app.cache_reconciler import run_reconciler, warm_cache
+from app.change_feed import run_change_feed
+from app.event_publisher import event_publisher
+from app.db.read_db import read_router
+from app.metrics import monitor_event_loop_lag, registry
 
-# Configure logging
-logging.basicConfig(level=getattr(logging, settings.LOG_LEVEL))
+# Configure logging (non-blocking queue handler unless LOG_ASYNC=false)
+setup_logging()
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background tasks with the app and cancel them on shutdown"""
+    # L1 invalidation and read-your-writes wake-ups share one subscription per process
+    background = [asyncio.create_task(run_invalidation_listener())]
+    background.append(asyncio.create_task(monitor_event_loop_lag(settings.EVENT_LOOP_LAG_INTERVAL_SECONDS)))
+    if settings.EVENT_PUBLISHER_ENABLED:
+        event_publisher.start()
+    # One change feed subscription per process, fanned out to its SSE clients
+    background.append(asyncio.create_task(run_change_feed()))
+    # Know which replicas are up (and how far behind) before the first request
+    await read_router.check_all()
+    background.append(asyncio.create_task(read_router.run_health_checks()))
+    if settings.CACHE_WARM_ON_STARTUP:
+        await warm_cache()
+    if settings.CACHE_RECONCILE_ENABLED:
+        background.append(asyncio.create_task(run_reconciler()))
+    yield
+    # Publish the events of the last requests before stopping (the relay takes the rest)
+    await event_publisher.stop()
+    for task in background:
+        task.cancel()
+    await asyncio.gather(*background, return_exceptions=True)
+
+
 # Create FastAPI app
 app = FastAPI(
     title=settings.PROJECT_NAME,
     description="A FastAPI application demonstrating CQRS pattern with task management",
-    version=settings.VERSION
+    version=settings.VERSION,
+    lifespan=lifespan,
 )
 
 # Add middleware
 app.add_middleware(LoggingMiddleware)
+# Added last so it is outermost and times the whole request
+app.add_middleware(MetricsMiddleware)
 
 # Include all routers
 for router in routers:
@@ -30,4 +70,13 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy"}
+    health = {"status": "healthy"}
+    if l1_cache:
+        health["l1_cache"] = l1_cache.stats()
+    return health
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def metrics():
+    """Prometheus metrics (text exposition format)"""
+    return PlainTextResponse(await registry.render(), media_type="text/plain; version=0.0.4")
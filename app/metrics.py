@@ -0,0 +1,428 @@
+"""In-process metrics with Prometheus text exposition (GET /metrics).
+
+Recording is a dict lookup plus an integer/float add (histograms add a bisect),
+with no locks: the API runs on one event loop. Expensive values (pool state,
+L1 stats, Celery queue depth, projector stream backlog, replication lag) are
+gathered at scrape time by collectors, never on the request path.
+
+Event loop lag (how late a timer fires, i.e. how long the loop was blocked by
+synchronous work) is sampled by `monitor_event_loop_lag`, a background task of
+the API.
+
+Replication lag is observed by the projector (Celery worker or app.projector), so it is recorded in Redis
+(one pipelined round trip per projected batch) and read back at scrape time.
+"""
+import asyncio
+import logging
+from bisect import bisect_left
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+LAG_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Labels = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Labels, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labels, value in self._values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        # labels -> [count per bucket (last one is +Inf), sum]
+        self._series: Dict[Labels, list] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, total) in self._series.items():
+            lines.extend(render_histogram_series(self.name, self.labelnames, labels, self.buckets, counts, total))
+        return lines
+
+
+def render_histogram_series(
+    name: str,
+    labelnames: Sequence[str],
+    labels: Sequence[str],
+    buckets: Sequence[float],
+    counts: Sequence[int],
+    total: float,
+) -> List[str]:
+    """Cumulative `_bucket` lines plus `_sum` and `_count` from per-bucket counts"""
+    lines = []
+    cumulative = 0
+    for bound, count in zip(list(buckets) + [float("inf")], counts):
+        cumulative += count
+        le = f'le="{_format_bound(bound)}"'
+        lines.append(f"{name}_bucket{_format_labels(labelnames, labels, le)} {cumulative}")
+    lines.append(f"{name}_sum{_format_labels(labelnames, labels)} {total}")
+    lines.append(f"{name}_count{_format_labels(labelnames, labels)} {cumulative}")
+    return lines
+
+
+def gauge_lines(name: str, documentation: str, samples: Iterable[Tuple[Dict[str, str], float]]) -> List[str]:
+    """Render a gauge from (labels, value) samples computed at scrape time"""
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} gauge"]
+    for labels, value in samples:
+        lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {value}")
+    return lines
+
+
+Collector = Callable[[], Awaitable[List[str]]]
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List = []
+        self._collectors: List[Collector] = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector: Collector) -> Collector:
+        self._collectors.append(collector)
+        return collector
+
+    async def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            try:
+                lines.extend(await collector())
+            except Exception as e:
+                # A failing source (e.g. Redis down) must not break the whole scrape
+                logger.warning(f"Metrics collector {collector.__name__} failed: {e}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+http_request_duration = registry.register(Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template",
+    ("method", "route", "status"),
+))
+db_pool_checkout_wait = registry.register(Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled DB connection",
+    ("pool",),
+))
+cache_requests = registry.register(Counter(
+    "cache_requests_total",
+    "Redis cache lookups by layer (task, snapshot) and result (hit, miss)",
+    ("layer", "result"),
+))
+
+cache_reconciled = registry.register(Counter(
+    "cache_reconciled_total",
+    "Index entries handled by the background reconciler by action (refilled, evicted, renewed)",
+    ("action",),
+))
+
+tombstones_purged = registry.register(Counter(
+    "tombstones_purged_total",
+    "Delete versions dropped from the read DB tombstones past TOMBSTONE_RETENTION_SECONDS",
+))
+
+consistent_reads = registry.register(Counter(
+    "consistent_reads_total",
+    "Reads with min_version by how they were served (fresh, waited, write_db)",
+    ("result",),
+))
+
+change_feed_events = registry.register(Counter(
+    "change_feed_events_total",
+    "Change events received by this API process for its change feed clients",
+))
+change_feed_dropped_clients = registry.register(Counter(
+    "change_feed_dropped_clients_total",
+    "Change feed clients disconnected because their buffer filled up",
+))
+change_feed_resumes = registry.register(Counter(
+    "change_feed_resumes_total",
+    "Change feed resumes by result (replayed, reset when the events were trimmed)",
+    ("result",),
+))
+
+event_loop_lag = registry.register(Histogram(
+    "event_loop_lag_seconds",
+    "How late a timer on the event loop fires (time the loop was blocked)",
+))
+event_publisher_events = registry.register(Counter(
+    "event_publisher_events_total",
+    "Committed outbox events handed to the in-process publisher by result "
+    "(published, relayed: already taken by the relay, overflow, failed, unflushed: queued at shutdown)",
+    ("result",),
+))
+
+
+def cache_hit(layer: str, count: int = 1) -> None:
+    cache_requests.inc(layer, "hit", amount=count)
+
+
+def cache_miss(layer: str, count: int = 1) -> None:
+    cache_requests.inc(layer, "miss", amount=count)
+
+
+async def monitor_event_loop_lag(interval: float) -> None:
+    """Sleep `interval` seconds at a time and record how late each wake-up is"""
+    loop = asyncio.get_running_loop()
+    while True:
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        event_loop_lag.observe(max(loop.time() - expected, 0.0))
+
+
+# ---------- Replication lag (recorded by the worker, stored in Redis) ----------
+REPLICATION_LAG_KEY = "metrics:replication_lag"  # hash: bucket index / "sum" -> value
+
+
+def replication_lags(events: List[dict], now: Optional[datetime] = None) -> List[float]:
+    """Seconds from write commit (outbox `committed_at`) to now, for events that carry it"""
+    now = now or datetime.utcnow()
+    lags = []
+    for event in events:
+        committed_at = event.get("committed_at")
+        if committed_at:
+            lags.append(max((now - datetime.fromisoformat(committed_at)).total_seconds(), 0.0))
+    return lags
+
+
+def _lag_bucket_counts(lags: List[float]) -> Dict[int, int]:
+    counts: Dict[int, int] = {}
+    for lag in lags:
+        index = bisect_left(LAG_BUCKETS, lag)
+        counts[index] = counts.get(index, 0) + 1
+    return counts
+
+
+def _queue_lag_observations(pipe, lags: List[float]) -> None:
+    for index, count in _lag_bucket_counts(lags).items():
+        pipe.hincrby(REPLICATION_LAG_KEY, str(index), count)
+    pipe.hincrbyfloat(REPLICATION_LAG_KEY, "sum", sum(lags))
+
+
+def record_replication_lag_sync(lags: List[float]) -> None:
+    """Add observations to the shared lag histogram (one pipelined round trip)"""
+    if not lags:
+        return
+    from app.cache import redis_cache
+
+    try:
+        pipe = redis_cache._sync_client.pipeline(transaction=False)
+        _queue_lag_observations(pipe, lags)
+        pipe.execute()
+    except Exception as e:
+        # The projection itself succeeded; losing a sample is fine
+        logger.warning(f"Could not record replication lag: {e}")
+
+
+async def record_replication_lag_async(lags: List[float]) -> None:
+    """record_replication_lag_sync for the asyncio projector"""
+    from app.cache import redis_cache
+
+    if not lags or not redis_cache._async_client:
+        return
+    try:
+        pipe = redis_cache._async_client.pipeline(transaction=False)
+        _queue_lag_observations(pipe, lags)
+        await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Could not record replication lag: {e}")
+
+
+async def _replication_lag_collector() -> List[str]:
+    from app.cache import redis_cache
+
+    if not redis_cache._async_client:
+        return []
+    stored = await redis_cache._async_client.hgetall(REPLICATION_LAG_KEY)
+    name = "replication_lag_seconds"
+    lines = [
+        f"# HELP {name} Write commit to read-side projection applied (outbox committed_at to worker)",
+        f"# TYPE {name} histogram",
+    ]
+    counts = [int(stored.get(str(index), 0)) for index in range(len(LAG_BUCKETS) + 1)]
+    lines.extend(render_histogram_series(name, (), (), LAG_BUCKETS, counts, float(stored.get("sum", 0))))
+    return lines
+
+
+async def _db_pool_collector() -> List[str]:
+    from app.db.read_db import read_router
+    from app.db.write_db import async_engine as write_engine
+
+    samples = {"size": [], "checked_out": [], "overflow": []}
+    # Same names as the pools' checkout wait label: read, read-replica-1, ...
+    engines = [("read", read_router.primary.engine)]
+    engines += [(f"read-{replica.name}", replica.engine) for replica in read_router.replicas]
+    for name, engine in engines + [("write", write_engine)]:
+        pool = engine.sync_engine.pool
+        if not hasattr(pool, "checkedout"):
+            continue
+        samples["size"].append(({"pool": name}, pool.size()))
+        samples["checked_out"].append(({"pool": name}, pool.checkedout()))
+        samples["overflow"].append(({"pool": name}, pool.overflow()))
+    return (
+        gauge_lines("db_pool_size", "Configured pool size", samples["size"])
+        + gauge_lines("db_pool_checked_out", "Connections currently checked out", samples["checked_out"])
+        + gauge_lines("db_pool_overflow", "Overflow connections in use (negative: unused capacity)", samples["overflow"])
+    )
+
+
+async def _read_router_collector() -> List[str]:
+    from app.db.read_db import read_router
+
+    if not read_router.replicas:
+        return []
+    targets = read_router.targets
+    return (
+        gauge_lines("read_replica_healthy", "1 if the read target passes health checks",
+                    [({"target": t.name}, int(t.healthy)) for t in targets])
+        + gauge_lines("read_replica_lag_seconds", "Replication lag at the last health check",
+                      [({"target": t.name}, t.lag_seconds) for t in targets])
+        + gauge_lines("read_replica_outstanding_sessions", "Read sessions currently open on the target",
+                      [({"target": t.name}, t.outstanding) for t in targets])
+        + [
+            "# HELP read_router_sessions_total Read sessions routed to each target",
+            "# TYPE read_router_sessions_total counter",
+        ]
+        + [f'read_router_sessions_total{{target="{t.name}"}} {t.routed}' for t in targets]
+    )
+
+
+async def _event_publisher_collector() -> List[str]:
+    from app.event_publisher import event_publisher
+
+    return gauge_lines(
+        "event_publisher_queue_depth", "Outbox event ids waiting in the in-process publisher queue",
+        [({}, event_publisher.queue_depth)],
+    )
+
+
+async def _change_feed_collector() -> List[str]:
+    from app.change_feed import change_feed
+
+    return gauge_lines(
+        "change_feed_clients", "Change feed (SSE) clients connected to this API process",
+        [({}, change_feed.client_count)],
+    )
+
+
+async def _l1_cache_collector() -> List[str]:
+    from app.cache.redis_cache import l1_cache
+
+    if not l1_cache:
+        return []
+    stats = l1_cache.stats()
+    return (
+        gauge_lines("l1_cache_entries", "Entries in the in-process L1 cache", [({}, stats["entries"])])
+        + gauge_lines("l1_cache_bytes", "Approximate bytes held by the L1 cache", [({}, stats["bytes"])])
+        + [
+            "# HELP l1_cache_requests_total L1 cache lookups by result",
+            "# TYPE l1_cache_requests_total counter",
+            f'l1_cache_requests_total{{result="hit"}} {stats["hits"]}',
+            f'l1_cache_requests_total{{result="miss"}} {stats["misses"]}',
+            "# HELP l1_cache_evictions_total L1 entries evicted for size",
+            "# TYPE l1_cache_evictions_total counter",
+            f"l1_cache_evictions_total {stats['evictions']}",
+        ]
+    )
+
+
+async def _celery_queue_collector() -> List[str]:
+    from app.cache import redis_cache
+    from app.celery_app import celery_app
+
+    if not redis_cache._async_client:
+        return []
+    queue = celery_app.conf.task_default_queue
+    depth = await redis_cache._async_client.llen(queue)
+    return gauge_lines("celery_queue_depth", "Messages waiting in the Celery broker queue", [({"queue": queue}, depth)])
+
+
+async def _projector_stream_collector() -> List[str]:
+    from app.cache import redis_cache
+    from app.config.settings import settings
+
+    client = redis_cache._async_client
+    if not client or not await client.exists(settings.PROJECTOR_STREAM):
+        return []
+    pipe = client.pipeline(transaction=False)
+    pipe.xlen(settings.PROJECTOR_STREAM)
+    pipe.xinfo_groups(settings.PROJECTOR_STREAM)
+    pipe.xlen(settings.PROJECTOR_DEAD_LETTER_STREAM)
+    length, groups, dead = await pipe.execute()
+    stream = {"stream": settings.PROJECTOR_STREAM}
+    return (
+        gauge_lines("projector_stream_length", "Entries in the projector stream (applied ones are deleted)", [(stream, length)])
+        + gauge_lines(
+            "projector_stream_pending",
+            "Entries delivered to a projector but not yet acknowledged",
+            [({**stream, "group": group["name"]}, group["pending"]) for group in groups],
+        )
+        + gauge_lines(
+            "projector_stream_lag",
+            "Entries not yet delivered to the group (Redis 7+)",
+            [({**stream, "group": group["name"]}, group["lag"]) for group in groups if group.get("lag") is not None],
+        )
+        + gauge_lines(
+            "projector_dead_letters",
+            "Entries in the dead-letter stream",
+            [({"stream": settings.PROJECTOR_DEAD_LETTER_STREAM}, dead)],
+        )
+    )
+
+
+registry.add_collector(_db_pool_collector)
+registry.add_collector(_read_router_collector)
+registry.add_collector(_l1_cache_collector)
+registry.add_collector(_celery_queue_collector)
+registry.add_collector(_replication_lag_collector)
+registry.add_collector(_projector_stream_collector)
+registry.add_collector(_change_feed_collector)
+registry.add_collector(_event_publisher_collector)
@@ -1,27 +1,64 @@
 import time
+import random
 import logging
-from fastapi import Request
-from starlette.middleware.base import BaseHTTPMiddleware
-
-logger = logging.getLogger(__name__)
-
-
-class LoggingMiddleware(BaseHTTPMiddleware):
-    """Middleware for logging HTTP requests and responses"""
-    
-    async def dispatch(self, request: Request, call_next):
-        start_time = time.time()
-        
-        # Log request
-        logger.info(f"Request: {request.method} {request.url}")
-        
-        # Process request
-        response = await call_next(request)
-        
-        # Calculate processing time
-        process_time = time.time() - start_time
-        
-        # Log response
-        logger.info(f"Response: {response.status_code} - Processed in {process_time:.4f}s")
-        
-        return response
+from app.config.settings import settings
+
+logger = logging.getLogger("app.access")
+
+_MODES = ("all", "sampled", "slow", "off")
+
+
+class LoggingMiddleware:
+    """Pure ASGI access log: one line per logged request, formatted only if emitted.
+
+    ACCESS_LOG_MODE selects which requests are logged: "all", "sampled"
+    (ACCESS_LOG_SAMPLE_RATE of them), "slow" or "off". "sampled" and "slow"
+    always log requests slower than ACCESS_LOG_SLOW_MS and 5xx responses.
+    """
+
+    def __init__(
+        self,
+        app,
+        mode: str = settings.ACCESS_LOG_MODE,
+        sample_rate: float = settings.ACCESS_LOG_SAMPLE_RATE,
+        slow_ms: float = settings.ACCESS_LOG_SLOW_MS,
+    ):
+        if mode not in _MODES:
+            raise ValueError(f"ACCESS_LOG_MODE must be one of {_MODES}, got {mode!r}")
+        self.app = app
+        self.mode = mode
+        self.sample_rate = sample_rate
+        self.slow_seconds = slow_ms / 1000
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.mode == "off":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            if self._should_log(elapsed, status):
+                logger.info(
+                    "%s %s%s%s %d %.1fms",
+                    scope["method"],
+                    scope["path"],
+                    "?" if scope["query_string"] else "",
+                    scope["query_string"].decode("latin-1"),
+                    status,
+                    elapsed * 1000,
+                )
+
+    def _should_log(self, elapsed: float, status: int) -> bool:
+        if self.mode == "all" or elapsed >= self.slow_seconds or status >= 500:
+            return True
+        return self.mode == "sampled" and random.random() < self.sample_rate
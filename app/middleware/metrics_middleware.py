@@ -0,0 +1,45 @@
+import time
+from app.metrics import http_request_duration
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording `http_request_duration_seconds`.
+
+    Requests are labelled by route template (e.g. /v1/tasks/{task_id}), not the
+    raw path, so label cardinality stays bounded. Server-sent event streams
+    (/v1/tasks/changes) stay open for as long as the client listens, so they are
+    left out; the change_feed_* metrics cover them.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = "500"
+        event_stream = False
+
+        async def send_wrapper(message):
+            nonlocal status, event_stream
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+                event_stream = any(
+                    name.lower() == b"content-type" and value.startswith(b"text/event-stream")
+                    for name, value in message.get("headers", ())
+                )
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            if not event_stream:
+                route = scope.get("route")
+                http_request_duration.observe(
+                    time.perf_counter() - start,
+                    scope["method"],
+                    route.path if route is not None else "unmatched",
+                    status,
+                )
@@ -0,0 +1,107 @@
+"""Outbox relay: drains the write DB `outbox` table into the broker.
+
+Run with `python -m app.outbox_relay`. Each round locks the oldest
+OUTBOX_BATCH_SIZE rows (FOR UPDATE SKIP LOCKED), publishes them and deletes
+them in the same transaction, so an event is only removed once the broker has
+accepted it (at-least-once). With OUTBOX_PUBLISHER=celery (default) a batch is
+one `sync_task_events` message; with OUTBOX_PUBLISHER=stream every event is an
+entry of PROJECTOR_STREAM (one pipelined XADD per batch) for app.projector.
+Batches are published in outbox id order; run a single relay if the
+projection depends on strict ordering across batches.
+
+API processes publish the events they commit right away (app.event_publisher)
+with `drain_once(event_ids=...)`. While EVENT_PUBLISHER_ENABLED, the relay is the
+fallback: it only takes events older than EVENT_PUBLISHER_RELAY_GRACE_MS, which
+the API did not publish (queue overflow, broker error, crash), and SKIP LOCKED
+keeps the two from publishing the same rows.
+"""
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional
+from sqlalchemy import delete
+from sqlalchemy.future import select
+from app.cache import redis_cache
+from app.config.settings import settings
+from app.db.models import OutboxEvent
+from app.db.write_db import async_write_session
+from app.serialization import dumps
+from app.tasks import sync_task_events
+
+logger = logging.getLogger(__name__)
+
+
+def _to_message(event: OutboxEvent) -> dict:
+    return {
+        "seq": event.id,
+        "type": event.event_type,
+        "task_id": event.task_id,
+        "data": event.payload,
+        "committed_at": event.created_at.isoformat(),
+    }
+
+
+async def _publish_to_stream(messages: List[dict]) -> None:
+    pipe = redis_cache._async_client.pipeline(transaction=False)
+    for message in messages:
+        pipe.xadd(settings.PROJECTOR_STREAM, {"event": dumps(message)})
+    await pipe.execute()
+
+
+async def _publish(messages: List[dict]) -> None:
+    if settings.OUTBOX_PUBLISHER == "stream":
+        await _publish_to_stream(messages)
+    else:
+        # One broker round trip for the whole batch; kombu blocks, so off the event loop
+        await asyncio.to_thread(sync_task_events.apply_async, args=[messages])
+
+
+async def drain_once(batch_size: int = settings.OUTBOX_BATCH_SIZE, event_ids: Optional[List[int]] = None) -> int:
+    """Publish one batch of pending outbox events (the oldest, or those among
+    `event_ids` still pending and not locked by another publisher); returns how
+    many were relayed"""
+    query = select(OutboxEvent)
+    if event_ids is not None:
+        query = query.where(OutboxEvent.id.in_(event_ids))
+    elif settings.EVENT_PUBLISHER_ENABLED:
+        # Fresh events are the API publisher's
+        grace = timedelta(milliseconds=settings.EVENT_PUBLISHER_RELAY_GRACE_MS)
+        query = query.where(OutboxEvent.created_at < datetime.utcnow() - grace)
+    async with async_write_session() as session:
+        async with session.begin():
+            result = await session.execute(
+                query
+                .order_by(OutboxEvent.id)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            rows: List[OutboxEvent] = result.scalars().all()
+            if not rows:
+                return 0
+            await _publish([_to_message(row) for row in rows])
+            await session.execute(
+                delete(OutboxEvent).where(OutboxEvent.id.in_([row.id for row in rows]))
+            )
+    logger.debug(f"Relayed {len(rows)} outbox events (last seq {rows[-1].id})")
+    return len(rows)
+
+
+async def run_relay() -> None:
+    logger.info(
+        f"Outbox relay started (batch size {settings.OUTBOX_BATCH_SIZE}, "
+        f"poll interval {settings.OUTBOX_POLL_INTERVAL_SECONDS}s)"
+    )
+    while True:
+        try:
+            relayed = await drain_once()
+        except Exception as e:
+            logger.error(f"❌ Outbox relay error: {e}")
+            relayed = 0
+        # Keep draining while batches come back full; otherwise wait for new events
+        if relayed < settings.OUTBOX_BATCH_SIZE:
+            await asyncio.sleep(settings.OUTBOX_POLL_INTERVAL_SECONDS)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=getattr(logging, settings.LOG_LEVEL))
+    asyncio.run(run_relay())
@@ -0,0 +1,215 @@
+"""Batched, version-guarded read-side projection.
+
+Outbox events arrive in batches (see app.outbox_relay). A batch is coalesced to
+the newest event per task id and applied with one multi-row
+`INSERT ... ON CONFLICT DO UPDATE ... WHERE tasks.version < excluded.version`,
+one `DELETE ... WHERE id IN (...)` and one pipelined Redis write
+(compare-and-set on the task version), instead of a merge + commit + two Redis
+calls per event.
+
+Because every change carries the write-side version, batches can be applied by
+any number of workers in any order: older events never overwrite newer state.
+Deletes leave a tombstone so a late update cannot resurrect the task.
+
+`apply_events_sync` serves the Celery worker; `apply_events_async` is the same
+projection on the async engine and Redis client, for app.projector.
+"""
+import logging
+from datetime import datetime
+from typing import Iterable, List, Set, Tuple
+from sqlalchemy import delete, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from app.cache.redis_cache import cache_apply_changes_async, cache_apply_changes_sync
+from app.cache.search_index import search_index_apply_async, search_index_apply_sync
+from app.config.settings import settings
+from app.db.models import Task, TaskTombstone
+from app.db.read_db import async_read_primary_session
+from app.db.read_db_sync import SyncSessionLocal
+from app.metrics import record_replication_lag_async, record_replication_lag_sync, replication_lags
+
+logger = logging.getLogger(__name__)
+
+_UPSERT_COLUMNS = ("title", "description", "is_completed", "created_at", "updated_at", "version")
+
+# Deletes recorded before tasks were versioned win over any update
+_UNVERSIONED_DELETE = 2**31 - 1
+
+_INSERTS = {
+    "postgresql": pg_insert,
+    "sqlite": sqlite_insert,
+}
+
+# Serialize concurrent writers of the read model (projectors, app.rebuild) per task id
+# (sorted, so lock order is global)
+LOCK_TASK_IDS_SQL = text(
+    "SELECT pg_advisory_xact_lock(hashtextextended(id, 0)) "
+    "FROM (SELECT DISTINCT unnest(CAST(:ids AS text[])) AS id ORDER BY id) AS ids"
+)
+
+
+def _to_row(task_data: dict) -> dict:
+    row = {"id": task_data["id"]}
+    for field in _UPSERT_COLUMNS:
+        row[field] = task_data.get(field)
+    for field in ("created_at", "updated_at"):
+        if isinstance(row[field], str):
+            row[field] = datetime.fromisoformat(row[field])
+    # Older events carry no updated_at/version; every row needs the same columns
+    if row["updated_at"] is None:
+        row["updated_at"] = row["created_at"]
+    if row["is_completed"] is None:
+        row["is_completed"] = False
+    if row["version"] is None:
+        row["version"] = 1
+    return row
+
+
+def event_version(event: dict) -> int:
+    data = event.get("data") or {}
+    if data.get("version") is not None:
+        return int(data["version"])
+    return _UNVERSIONED_DELETE if event["type"] == "deleted" else 1
+
+
+def coalesce_events(events: Iterable[dict]) -> Tuple[List[dict], List[Tuple[str, int]]]:
+    """Keep only the newest event per task id; returns (upsert rows, (deleted id, version))"""
+    latest = {}
+    for event in events:
+        version = event_version(event)
+        current = latest.get(event["task_id"])
+        if current is None or version >= current[0]:
+            latest[event["task_id"]] = (version, event)
+    upserts: List[dict] = []
+    deletes: List[Tuple[str, int]] = []
+    unversioned: List[str] = []
+    for task_id, (version, event) in latest.items():
+        if event["type"] == "deleted":
+            deletes.append((task_id, version))
+        else:
+            upserts.append(_to_row(event["data"]))
+            if (event.get("data") or {}).get("version") is None:
+                unversioned.append(task_id)
+    if unversioned:
+        # Messages from before tasks were versioned project as version 1, which the
+        # version guard drops for any task the read model already holds
+        logger.warning(
+            f"Projecting {len(unversioned)} unversioned updates as version 1, skipped where the "
+            f"read model already has the task (run app.rebuild --reset to resync): {unversioned[:10]}"
+        )
+    return upserts, deletes
+
+
+def _insert_for(dialect_name: str):
+    try:
+        return _INSERTS[dialect_name]
+    except KeyError:
+        raise ValueError(f"Bulk upsert is not supported for dialect {dialect_name!r}")
+
+
+def _version_guarded(stmt):
+    return stmt.on_conflict_do_update(
+        index_elements=[Task.id],
+        set_={column: stmt.excluded[column] for column in _UPSERT_COLUMNS},
+        where=Task.version < stmt.excluded.version,
+    )
+
+
+def upsert_statement(dialect_name: str, rows: List[dict]):
+    """Multi-row upsert that only overwrites rows holding an older version"""
+    return _version_guarded(_insert_for(dialect_name)(Task).values(rows))
+
+
+def upsert_from_select_statement(dialect_name: str, rows_select):
+    """upsert_statement for rows produced by a SELECT (e.g. from a COPY staging table)"""
+    columns = ["id", *_UPSERT_COLUMNS]
+    return _version_guarded(_insert_for(dialect_name)(Task).from_select(columns, rows_select))
+
+
+def tombstone_statement(dialect_name: str, deletes: List[Tuple[str, int]]):
+    stmt = _insert_for(dialect_name)(TaskTombstone).values(
+        [{"id": task_id, "version": version} for task_id, version in deletes]
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[TaskTombstone.id],
+        set_={"version": stmt.excluded.version},
+        where=TaskTombstone.version < stmt.excluded.version,
+    )
+
+
+def _chunks(items: List, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _tombstoned_ids(db: Session, task_ids: List[str]) -> Set[str]:
+    tombstoned: Set[str] = set()
+    for chunk in _chunks(task_ids, settings.PROJECTION_MAX_BATCH_SIZE):
+        result = db.execute(select(TaskTombstone.id).where(TaskTombstone.id.in_(chunk)))
+        tombstoned.update(result.scalars().all())
+    return tombstoned
+
+
+def apply_events_sync(events: List[dict]) -> Tuple[int, int]:
+    """Apply a batch of outbox events to the read DB and cache; returns (upserted, deleted)"""
+    upserts, deletes = coalesce_events(events)
+    batch_size = settings.PROJECTION_MAX_BATCH_SIZE
+    db = SyncSessionLocal()
+    try:
+        dialect_name = db.get_bind().dialect.name
+        if dialect_name == "postgresql":
+            db.execute(LOCK_TASK_IDS_SQL, {"ids": [row["id"] for row in upserts] + [d[0] for d in deletes]})
+        # Deletes are terminal: drop late updates for tasks that are already gone
+        tombstoned = _tombstoned_ids(db, [row["id"] for row in upserts])
+        upserts = [row for row in upserts if row["id"] not in tombstoned]
+        for chunk in _chunks(upserts, batch_size):
+            db.execute(upsert_statement(dialect_name, chunk))
+        for chunk in _chunks(deletes, batch_size):
+            db.execute(tombstone_statement(dialect_name, chunk))
+            db.execute(delete(Task).where(Task.id.in_([task_id for task_id, _ in chunk])))
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    # The read DB is committed before Redis is written. If Redis fails, the caller
+    # must let the error propagate so the batch is retried: the DB upsert is then a
+    # no-op and only the cache and search index writes take effect.
+    cache_apply_changes_sync(upserts, deletes)
+    search_index_apply_sync(upserts, deletes)
+    record_replication_lag_sync(replication_lags(events))
+    return len(upserts), len(deletes)
+
+
+async def _tombstoned_ids_async(session, task_ids: List[str]) -> Set[str]:
+    tombstoned: Set[str] = set()
+    for chunk in _chunks(task_ids, settings.PROJECTION_MAX_BATCH_SIZE):
+        result = await session.execute(select(TaskTombstone.id).where(TaskTombstone.id.in_(chunk)))
+        tombstoned.update(result.scalars().all())
+    return tombstoned
+
+
+async def apply_events_async(events: List[dict]) -> Tuple[int, int]:
+    """apply_events_sync on the async read engine and Redis client; returns (upserted, deleted)"""
+    upserts, deletes = coalesce_events(events)
+    batch_size = settings.PROJECTION_MAX_BATCH_SIZE
+    async with async_read_primary_session() as session:
+        async with session.begin():
+            dialect_name = session.get_bind().dialect.name
+            if dialect_name == "postgresql":
+                await session.execute(
+                    LOCK_TASK_IDS_SQL, {"ids": [row["id"] for row in upserts] + [d[0] for d in deletes]}
+                )
+            tombstoned = await _tombstoned_ids_async(session, [row["id"] for row in upserts])
+            upserts = [row for row in upserts if row["id"] not in tombstoned]
+            for chunk in _chunks(upserts, batch_size):
+                await session.execute(upsert_statement(dialect_name, chunk))
+            for chunk in _chunks(deletes, batch_size):
+                await session.execute(tombstone_statement(dialect_name, chunk))
+                await session.execute(delete(Task).where(Task.id.in_([task_id for task_id, _ in chunk])))
+    await cache_apply_changes_async(upserts, deletes)
+    await search_index_apply_async(upserts, deletes)
+    await record_replication_lag_async(replication_lags(events))
+    return len(upserts), len(deletes)
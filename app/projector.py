@@ -0,0 +1,184 @@
+"""Asyncio projector: applies change events from a Redis Stream consumer group.
+
+Run with `python -m app.projector`, with the relay publishing to the stream
+(OUTBOX_PUBLISHER=stream). An alternative to the Celery worker: one event loop
+reads PROJECTOR_BATCH_SIZE entries per XREADGROUP and applies them with
+`apply_events_async` (async engine, pipelined async Redis), so a batch costs a
+few round trips instead of a prefork process per message.
+
+Delivery is at-least-once and the projection is version-guarded, so replays are
+harmless:
+
+- a batch is acknowledged (XACK + XDEL in one MULTI) only after it is applied;
+  if it fails, its events are retried one by one and failures stay pending;
+- entries pending longer than PROJECTOR_CLAIM_IDLE_MS (failed, or their consumer
+  died) are claimed again; after PROJECTOR_MAX_DELIVERIES deliveries, or if they
+  cannot be decoded, they move to PROJECTOR_DEAD_LETTER_STREAM;
+- on start a consumer first re-reads the entries it took before a restart.
+
+Consumers are named by PROJECTOR_CONSUMER (default: host name); run several
+with distinct names to share the stream. Stream length, pending entries and
+dead letters are exported on GET /metrics.
+"""
+import asyncio
+import logging
+import os
+import socket
+from typing import Dict, List, Optional, Tuple
+from redis.exceptions import ResponseError
+from app.cache import redis_cache
+from app.config.settings import settings
+from app.projection import apply_events_async
+from app.serialization import loads
+
+logger = logging.getLogger(__name__)
+
+PROJECTOR_CONSUMER = os.getenv("PROJECTOR_CONSUMER", socket.gethostname())
+
+Entry = Tuple[str, Optional[Dict[str, str]]]
+
+
+async def ensure_group(client) -> None:
+    """Create the consumer group (and the stream) if missing; new groups start at the beginning"""
+    try:
+        await client.xgroup_create(settings.PROJECTOR_STREAM, settings.PROJECTOR_GROUP, id="0", mkstream=True)
+    except ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+async def _ack(client, entry_ids: List[str]) -> None:
+    pipe = client.pipeline(transaction=True)
+    pipe.xack(settings.PROJECTOR_STREAM, settings.PROJECTOR_GROUP, *entry_ids)
+    # The stream is the projector's work queue: applied entries are dropped
+    pipe.xdel(settings.PROJECTOR_STREAM, *entry_ids)
+    await pipe.execute()
+
+
+async def _dead_letter(client, entries: List[Entry], reason: str) -> None:
+    if not entries:
+        return
+    pipe = client.pipeline(transaction=True)
+    for entry_id, fields in entries:
+        pipe.xadd(settings.PROJECTOR_DEAD_LETTER_STREAM, {
+            "event": (fields or {}).get("event", ""),
+            "entry_id": entry_id,
+            "reason": reason,
+        })
+    ids = [entry_id for entry_id, _ in entries]
+    pipe.xack(settings.PROJECTOR_STREAM, settings.PROJECTOR_GROUP, *ids)
+    pipe.xdel(settings.PROJECTOR_STREAM, *ids)
+    await pipe.execute()
+    logger.error(f"❌ Moved {len(entries)} stream entries to {settings.PROJECTOR_DEAD_LETTER_STREAM}: {reason}")
+
+
+async def process_entries(client, entries: List[Entry]) -> int:
+    """Apply and acknowledge stream entries; returns how many were applied"""
+    decoded: List[Tuple[str, dict]] = []
+    malformed: List[Entry] = []
+    gone: List[str] = []
+    for entry_id, fields in entries:
+        if not fields:
+            # Deleted from the stream while still pending: nothing left to apply
+            gone.append(entry_id)
+            continue
+        try:
+            decoded.append((entry_id, loads(fields["event"])))
+        except (KeyError, ValueError):
+            malformed.append((entry_id, fields))
+    if gone:
+        await _ack(client, gone)
+    await _dead_letter(client, malformed, "malformed event")
+    if not decoded:
+        return 0
+
+    try:
+        await apply_events_async([event for _, event in decoded])
+        await _ack(client, [entry_id for entry_id, _ in decoded])
+        return len(decoded)
+    except Exception as e:
+        logger.error(f"❌ Error projecting {len(decoded)} stream entries: {e}")
+        if len(decoded) == 1:
+            return 0
+
+    # Isolate the failing events; the rest of the batch is applied now
+    applied = 0
+    for entry_id, event in decoded:
+        try:
+            await apply_events_async([event])
+            await _ack(client, [entry_id])
+            applied += 1
+        except Exception as e:
+            logger.error(f"❌ Error projecting stream entry {entry_id}, left pending: {e}")
+    return applied
+
+
+async def claim_stale_entries(client, consumer: str) -> List[Entry]:
+    """Take over entries pending longer than PROJECTOR_CLAIM_IDLE_MS; dead-letter exhausted ones"""
+    pending = await client.xpending_range(
+        settings.PROJECTOR_STREAM, settings.PROJECTOR_GROUP,
+        min="-", max="+", count=settings.PROJECTOR_BATCH_SIZE, idle=settings.PROJECTOR_CLAIM_IDLE_MS,
+    )
+    if not pending:
+        return []
+    exhausted = [p["message_id"] for p in pending if p["times_delivered"] >= settings.PROJECTOR_MAX_DELIVERIES]
+    retry = [p["message_id"] for p in pending if p["times_delivered"] < settings.PROJECTOR_MAX_DELIVERIES]
+    if exhausted:
+        claimed = await client.xclaim(
+            settings.PROJECTOR_STREAM, settings.PROJECTOR_GROUP, consumer,
+            settings.PROJECTOR_CLAIM_IDLE_MS, exhausted,
+        )
+        await _dead_letter(client, claimed, f"failed {settings.PROJECTOR_MAX_DELIVERIES} deliveries")
+    if not retry:
+        return []
+    logger.warning(f"Claiming {len(retry)} stale stream entries for redelivery")
+    return await client.xclaim(
+        settings.PROJECTOR_STREAM, settings.PROJECTOR_GROUP, consumer,
+        settings.PROJECTOR_CLAIM_IDLE_MS, retry,
+    )
+
+
+async def run_projector(consumer: str = PROJECTOR_CONSUMER) -> None:
+    client = redis_cache._async_client
+    await ensure_group(client)
+    logger.info(
+        f"Projector {consumer} consuming {settings.PROJECTOR_STREAM} as group {settings.PROJECTOR_GROUP} "
+        f"(batch size {settings.PROJECTOR_BATCH_SIZE})"
+    )
+    loop = asyncio.get_running_loop()
+    claim_every = settings.PROJECTOR_CLAIM_IDLE_MS / 1000
+    last_claim = loop.time()
+    # "0" reads this consumer's own pending entries (from before a restart); ">" new ones
+    read_from = "0"
+    while True:
+        try:
+            if loop.time() - last_claim >= claim_every:
+                last_claim = loop.time()
+                claimed = await claim_stale_entries(client, consumer)
+                if claimed:
+                    await process_entries(client, claimed)
+
+            response = await client.xreadgroup(
+                settings.PROJECTOR_GROUP, consumer, {settings.PROJECTOR_STREAM: read_from},
+                count=settings.PROJECTOR_BATCH_SIZE,
+                block=None if read_from != ">" else settings.PROJECTOR_BLOCK_MS,
+            )
+            entries = response[0][1] if response else []
+            if read_from != ">":
+                if not entries:
+                    read_from = ">"
+                    continue
+                read_from = entries[-1][0]
+            if entries:
+                applied = await process_entries(client, entries)
+                logger.debug("Projected %d/%d stream entries", applied, len(entries))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Projector error: {e}")
+            await asyncio.sleep(1)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=getattr(logging, settings.LOG_LEVEL))
+    asyncio.run(run_projector())
@@ -0,0 +1,244 @@
+"""Rebuild or backfill the read model (read DB, Redis cache, search index) from the write DB.
+
+Run with `python -m app.rebuild`. The write DB `tasks` table is streamed in id
+order through a server-side cursor, REBUILD_CHUNK_SIZE rows at a time, and
+REBUILD_CONCURRENCY loaders apply chunks in parallel:
+
+- read DB: COPY into a temp table + one `INSERT ... SELECT ... ON CONFLICT` on
+  Postgres (asyncpg), multi-row upserts elsewhere, in transactions of
+  PROJECTION_MAX_BATCH_SIZE rows that hold the projector's per-task advisory
+  locks;
+- Redis: the pipelined, version-guarded cache refill (`task:{id}`, `tasks:index`,
+  snapshot and status sets) and the search index.
+
+Every write is version-guarded (the projection's upsert), and tombstoned tasks
+are skipped under the same locks the projector takes, so a delete projected
+during the rebuild is never undone and a backfill can run while the API and
+projector are live. At most REBUILD_CONCURRENCY chunks
+are queued, so memory stays bounded whatever the table size.
+
+Progress is checkpointed in Redis (last contiguous task id loaded); an interrupted
+run resumes from there. `--restart` ignores the checkpoint; `--reset` first
+empties the read DB tasks table and the cached list (reads fall back to the DB
+until the rebuild finishes, then the snapshot is marked ready again). Without
+`--reset` the snapshot's ready flag is left as it was: the rebuild only adds and
+refreshes tasks, so it cannot vouch for a snapshot it did not empty first.
+"""
+import argparse
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional, Set
+from sqlalchemy import column, delete, select, table, text
+from app.cache import redis_cache
+from app.cache.redis_cache import cache_add_tasks_async, cache_clear_list_async, cache_mark_snapshot_ready_async
+from app.cache.search_index import search_index_apply_async
+from app.config.settings import settings
+from app.db.models import Task, TaskTombstone
+from app.db.read_db import async_engine as read_engine
+from app.db.write_db import async_engine as write_engine
+from app.projection import LOCK_TASK_IDS_SQL, upsert_from_select_statement, upsert_statement
+
+logger = logging.getLogger(__name__)
+
+REBUILD_CHECKPOINT_KEY = "rebuild:checkpoint"  # hash: last_id, rows
+
+_COLUMNS = ("id", "title", "description", "is_completed", "created_at", "updated_at", "version")
+_STAGE_TABLE = "tasks_rebuild_stage"
+_STAGE_SELECT = select(*[column(name) for name in _COLUMNS]).select_from(table(_STAGE_TABLE))
+
+
+def _chunks(items: List, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+async def _load_read_db_copy(conn, rows: List[dict]) -> None:
+    """Postgres: COPY into a per-connection temp table, then one set-based upsert"""
+    raw = await conn.get_raw_connection()
+    driver = raw.driver_connection
+    await driver.execute(
+        f"CREATE TEMP TABLE IF NOT EXISTS {_STAGE_TABLE} (LIKE tasks INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+    )
+    await driver.copy_records_to_table(
+        _STAGE_TABLE,
+        records=[tuple(row[column] for column in _COLUMNS) for row in rows],
+        columns=list(_COLUMNS),
+    )
+    await conn.execute(upsert_from_select_statement(conn.dialect.name, _STAGE_SELECT))
+
+
+async def _drop_tombstoned(conn, rows: List[dict]) -> List[dict]:
+    """Tasks deleted while the rebuild streams must not come back"""
+    result = await conn.execute(select(TaskTombstone.id).where(TaskTombstone.id.in_([row["id"] for row in rows])))
+    tombstoned: Set[str] = set(result.scalars().all())
+    return [row for row in rows if row["id"] not in tombstoned] if tombstoned else rows
+
+
+async def _load_read_db(rows: List[dict]) -> List[dict]:
+    """One transaction: lock the ids like the projector, skip tombstoned ones, upsert
+    the rest; returns the rows loaded. Kept to PROJECTION_MAX_BATCH_SIZE ids, since
+    every advisory lock holds a lock table slot until commit."""
+    async with read_engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            await conn.execute(LOCK_TASK_IDS_SQL, {"ids": [row["id"] for row in rows]})
+        rows = await _drop_tombstoned(conn, rows)
+        if not rows:
+            return rows
+        if conn.dialect.name == "postgresql" and conn.dialect.driver == "asyncpg":
+            await _load_read_db_copy(conn, rows)
+        else:
+            await conn.execute(upsert_statement(conn.dialect.name, rows))
+    return rows
+
+
+async def load_chunk(rows: List[dict]) -> None:
+    """Apply one chunk of write-side rows to the read DB, the cache and the search index"""
+    loaded: List[dict] = []
+    for batch in _chunks(rows, settings.PROJECTION_MAX_BATCH_SIZE):
+        loaded.extend(await _load_read_db(batch))
+    if not loaded:
+        return
+    # Version-guarded refills: a delete applied meanwhile has a newer version and wins
+    await cache_add_tasks_async(loaded)
+    await search_index_apply_async(loaded, [], "r")
+
+
+async def _read_checkpoint() -> Optional[str]:
+    if not redis_cache._async_client:
+        return None
+    return await redis_cache._async_client.hget(REBUILD_CHECKPOINT_KEY, "last_id")
+
+
+async def _write_checkpoint(last_id: str, rows: int) -> None:
+    if redis_cache._async_client:
+        await redis_cache._async_client.hset(REBUILD_CHECKPOINT_KEY, mapping={"last_id": last_id, "rows": rows})
+
+
+async def _clear_checkpoint() -> None:
+    if redis_cache._async_client:
+        await redis_cache._async_client.delete(REBUILD_CHECKPOINT_KEY)
+
+
+async def reset_read_model() -> None:
+    """Empty the read DB tasks table and the cached list before a full rebuild"""
+    async with read_engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            await conn.execute(text("TRUNCATE tasks"))
+        else:
+            await conn.execute(delete(Task))
+    # Versions (and with them cache-side tombstones) are kept; the refill is "not older"
+    await cache_clear_list_async()
+    client = redis_cache._async_client
+    if not client:
+        return
+    batch = []
+    async for key in client.scan_iter(match="task:*", count=1000):
+        batch.append(key)
+        if len(batch) >= 1000:
+            await client.unlink(*batch)
+            batch = []
+    if batch:
+        await client.unlink(*batch)
+
+
+class _Progress:
+    """Advances the checkpoint only past chunks whose predecessors are all loaded"""
+
+    def __init__(self):
+        self.rows = 0
+        self.started = time.perf_counter()
+        self._next_seq = 0
+        self._done: Dict[int, tuple] = {}
+
+    async def chunk_loaded(self, seq: int, last_id: str, count: int) -> None:
+        self._done[seq] = (last_id, count)
+        advanced = None
+        while self._next_seq in self._done:
+            advanced, count = self._done.pop(self._next_seq)
+            self.rows += count
+            self._next_seq += 1
+        if advanced is not None:
+            await _write_checkpoint(advanced, self.rows)
+            rate = self.rows / max(time.perf_counter() - self.started, 1e-9)
+            logger.info("Rebuilt %d tasks (up to id %s, %.0f rows/s)", self.rows, advanced, rate)
+
+
+async def _stream_chunks(queue: asyncio.Queue, after_id: Optional[str], chunk_size: int, loaders: int) -> None:
+    query = select(*[Task.__table__.c[column] for column in _COLUMNS]).order_by(Task.id)
+    if after_id is not None:
+        query = query.where(Task.id > after_id)
+    seq = 0
+    async with write_engine.connect() as conn:
+        result = await conn.stream(query.execution_options(yield_per=chunk_size))
+        async for partition in result.mappings().partitions(chunk_size):
+            await queue.put((seq, [dict(row) for row in partition]))
+            seq += 1
+    for _ in range(loaders):
+        await queue.put(None)
+
+
+async def _loader(queue: asyncio.Queue, progress: _Progress) -> None:
+    while True:
+        item = await queue.get()
+        if item is None:
+            return
+        seq, rows = item
+        await load_chunk(rows)
+        await progress.chunk_loaded(seq, rows[-1]["id"], len(rows))
+
+
+async def rebuild_read_model(
+    chunk_size: int = settings.REBUILD_CHUNK_SIZE,
+    concurrency: int = settings.REBUILD_CONCURRENCY,
+    reset: bool = False,
+    restart: bool = False,
+) -> int:
+    """Returns how many tasks were loaded by this run"""
+    if reset:
+        await reset_read_model()
+        logger.info("Read DB tasks table and cached list cleared")
+    after_id = None if reset or restart else await _read_checkpoint()
+    if after_id is not None:
+        logger.info("Resuming after task id %s", after_id)
+    else:
+        await _clear_checkpoint()
+
+    progress = _Progress()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+    workers = [asyncio.create_task(_loader(queue, progress)) for _ in range(concurrency)]
+    producer = asyncio.create_task(_stream_chunks(queue, after_id, chunk_size, concurrency))
+    try:
+        await asyncio.gather(producer, *workers)
+    except BaseException:
+        for task in [producer, *workers]:
+            task.cancel()
+        await asyncio.gather(producer, *workers, return_exceptions=True)
+        raise
+
+    await _clear_checkpoint()
+    if reset:
+        # The snapshot was emptied first, so it now holds exactly the write DB's tasks
+        await cache_mark_snapshot_ready_async()
+    return progress.rows
+
+
+async def _main(args) -> None:
+    started = time.perf_counter()
+    try:
+        total = await rebuild_read_model(args.chunk_size, args.concurrency, args.reset, args.restart)
+    finally:
+        await read_engine.dispose()
+        await write_engine.dispose()
+    elapsed = time.perf_counter() - started
+    logger.info("✅ Read model rebuilt (%d tasks in %.1fs)", total, elapsed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunk-size", type=int, default=settings.REBUILD_CHUNK_SIZE)
+    parser.add_argument("--concurrency", type=int, default=settings.REBUILD_CONCURRENCY)
+    parser.add_argument("--reset", action="store_true", help="empty the read DB tasks table and cached list first")
+    parser.add_argument("--restart", action="store_true", help="ignore the checkpoint and start from the first task")
+    logging.basicConfig(level=getattr(logging, settings.LOG_LEVEL))
+    asyncio.run(_main(parser.parse_args()))
@@ -1,34 +1,202 @@
 import logging
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request, Response
 from fastapi.params import Body
-from app.db.schemas import TaskCreateRequest, TaskOut
-from app.services.task_service import TaskService
+from fastapi.responses import StreamingResponse
+from app.config.settings import settings
+from datetime import datetime, timezone
+from typing import List, Optional
+from app.change_feed import stream_changes
+from app.db.schemas import (
+    TaskBatchDeleteRequest,
+    TaskBatchItemResult,
+    TaskBatchUpdateItem,
+    TaskCreateRequest,
+    TaskFilters,
+    TaskOut,
+)
+from app.serialization import JSONBytesResponse
+from app.services.task_service import InvalidCursor, TaskService
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/tasks", tags=["tasks"])
+CONSISTENCY_TOKEN_HEADER = "X-Consistency-Token"
+
+# Service output is built from trusted rows by `task_to_dict`, so endpoints return
+# JSONBytesResponse directly; `response_model` stays for the OpenAPI docs only.
+router = APIRouter(prefix="/tasks", tags=["tasks"], default_response_class=JSONBytesResponse)
 
 
 @router.post("/", response_model=TaskOut, status_code=201)
 async def create_task_endpoint(payload: TaskCreateRequest):
     """Create a new task"""
-    return await TaskService.create_task(payload)
+    task = await TaskService.create_task(payload)
+    return JSONBytesResponse(task, status_code=201, headers=_consistency_header(task["version"]))
+
+
+def _consistency_header(version: int) -> dict:
+    # Pass back as GET /tasks/{id}?min_version= to read your own write
+    return {CONSISTENCY_TOKEN_HEADER: str(version)}
+
+
+def _etag(version: Optional[int], prefix: str = "") -> Optional[str]:
+    # Weak: the same version always has the same content, not always the same bytes
+    return f'W/"{prefix}{version}"' if version is not None else None
+
+
+def _etag_headers(etag: Optional[str]) -> dict:
+    # no-cache: clients may store the response but must revalidate with If-None-Match
+    return {"ETag": etag, "Cache-Control": "no-cache"} if etag else {}
+
+
+def _not_modified(request: Request, etag: Optional[str]) -> bool:
+    if not etag:
+        return False
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    # Weak comparison (RFC 9110): W/ prefixes are ignored
+    candidates = {candidate.strip().removeprefix("W/") for candidate in header.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+def _not_modified_response(etag: str) -> Response:
+    return Response(status_code=304, headers=_etag_headers(etag))
+
+
+def _check_batch_size(items: list, limit: int) -> None:
+    if not items:
+        raise HTTPException(status_code=400, detail="Batch is empty")
+    if len(items) > limit:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds the maximum of {limit} items")
+
+
+@router.post("/batch", response_model=List[TaskBatchItemResult], status_code=201)
+async def create_tasks_batch_endpoint(payload: List[TaskCreateRequest]):
+    """Create many tasks in one transaction"""
+    _check_batch_size(payload, settings.TASK_BATCH_MAX_CREATE)
+    return JSONBytesResponse(await TaskService.create_tasks(payload), status_code=201)
+
+
+@router.put("/batch", response_model=List[TaskBatchItemResult])
+async def update_tasks_batch_endpoint(payload: List[TaskBatchUpdateItem]):
+    """Update many tasks in one transaction"""
+    _check_batch_size(payload, settings.TASK_BATCH_MAX_UPDATE)
+    return JSONBytesResponse(await TaskService.update_tasks(payload))
+
+
+@router.delete("/batch", response_model=List[TaskBatchItemResult])
+async def delete_tasks_batch_endpoint(payload: TaskBatchDeleteRequest):
+    """Delete many tasks in one transaction"""
+    _check_batch_size(payload.ids, settings.TASK_BATCH_MAX_DELETE)
+    return JSONBytesResponse(await TaskService.delete_tasks(payload.ids))
+
+
+def _naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    # created_at is stored as naive UTC; comparing it with an aware value fails on asyncpg
+    if value is None or value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _task_filters(
+    is_completed: bool | None = Query(default=None),
+    created_after: datetime | None = Query(default=None),
+    created_before: datetime | None = Query(default=None),
+    title_prefix: str | None = Query(default=None, min_length=1),
+) -> TaskFilters:
+    return TaskFilters(
+        is_completed=is_completed,
+        created_after=_naive_utc(created_after),
+        created_before=_naive_utc(created_before),
+        title_prefix=title_prefix,
+    )
 
 
 @router.get("/")
-async def get_task_endpoint():
-    """Get all tasks"""
-    tasks = await TaskService.get_all_tasks()
-    return tasks
+async def get_task_endpoint(
+    request: Request,
+    limit: int | None = Query(default=None, ge=1, le=settings.TASKS_PAGE_MAX_LIMIT),
+    cursor: str | None = Query(default=None),
+    stream: bool = Query(default=False),
+    filters: TaskFilters = Depends(_task_filters),
+):
+    """Get tasks: a keyset page when `limit`/`cursor` is given, a streamed JSON array
+    when `stream=true`, otherwise the full (cached) list. Filters apply to every mode.
+
+    The full list (optionally by status) carries an ETag; a matching If-None-Match
+    gets 304 after a single Redis GET."""
+    try:
+        if stream:
+            return StreamingResponse(TaskService.stream_tasks(cursor, filters), media_type="application/json")
+        if limit is None and cursor is None:
+            if filters.status_only():
+                # Read the version before the snapshot: the ETag may be older than the body, never newer
+                etag = _etag(await TaskService.get_list_version(), prefix="c")
+                if _not_modified(request, etag):
+                    return _not_modified_response(etag)
+                snapshot = await TaskService.get_all_tasks_json(filters.is_completed)
+                if snapshot is not None:
+                    return JSONBytesResponse(snapshot, headers=_etag_headers(etag))
+            if filters.is_empty():
+                return JSONBytesResponse(await TaskService.get_all_tasks())
+            return JSONBytesResponse(await TaskService.get_filtered_tasks(filters))
+        return JSONBytesResponse(await TaskService.get_tasks_page(
+            limit=limit or settings.TASKS_PAGE_DEFAULT_LIMIT,
+            cursor=cursor,
+            filters=filters,
+        ))
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+@router.get("/count")
+async def count_tasks_endpoint(filters: TaskFilters = Depends(_task_filters)):
+    """Count tasks matching the same filters as GET /tasks"""
+    return JSONBytesResponse({"count": await TaskService.count_tasks(filters)})
+
+
+@router.get("/search")
+async def search_tasks_endpoint(
+    q: str = Query(min_length=1),
+    limit: int = Query(default=settings.SEARCH_DEFAULT_LIMIT, ge=1, le=settings.SEARCH_MAX_LIMIT),
+    offset: int = Query(default=0, ge=0, le=settings.SEARCH_MAX_OFFSET),
+):
+    """Search task titles and descriptions; every query word must match, best matches first"""
+    return JSONBytesResponse(await TaskService.search_tasks(q, limit=limit, offset=offset))
+
+
+@router.get("/changes")
+async def task_changes_endpoint(
+    after: int | None = Query(default=None, ge=0),
+    last_event_id: int | None = Header(default=None, ge=0),
+):
+    """Server-sent events for every task create, update and delete as the projector
+    applies it. Resume with Last-Event-ID (sent by EventSource on reconnect) or `after`."""
+    return StreamingResponse(
+        stream_changes(last_event_id if last_event_id is not None else after),
+        media_type="text/event-stream",
+        # Keep proxies (nginx) from buffering or caching the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @router.get("/{task_id}", response_model=TaskOut)
-async def get_task_by_id_endpoint(task_id: str):
-    """Get a specific task by ID"""
-    task = await TaskService.get_task_by_id(task_id)
+async def get_task_by_id_endpoint(
+    request: Request,
+    task_id: str,
+    min_version: int | None = Query(default=None, ge=1),
+):
+    """Get a specific task by ID; `min_version` (a write's consistency token) waits
+    for that write to be visible instead of returning an older version.
+    The ETag is the task version; a matching If-None-Match gets 304."""
+    if min_version is None and request.headers.get("if-none-match"):
+        etag = _etag(await TaskService.get_task_version(task_id))
+        if _not_modified(request, etag):
+            return _not_modified_response(etag)
+    task = await TaskService.get_task_by_id(task_id, min_version=min_version)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
-    return task
+    return JSONBytesResponse(task, headers=_etag_headers(_etag(task.get("version"))))
 
 
 @router.put("/{task_id}", response_model=TaskOut)
@@ -47,13 +215,16 @@ async def update_task_endpoint(
     )
     if not updated:
         raise HTTPException(status_code=404, detail="Task not found")
-    return updated
+    return JSONBytesResponse(updated, headers=_consistency_header(updated["version"]))
 
 
 @router.delete("/{task_id}")
 async def delete_task_endpoint(task_id: str):
     """Delete a specific task by ID"""
-    ok = await TaskService.delete_task(task_id)
-    if not ok:
+    version = await TaskService.delete_task(task_id)
+    if version is None:
         raise HTTPException(status_code=404, detail="Task not found")
-    return {"status": "deleted", "id": task_id}
+    return JSONBytesResponse(
+        {"status": "deleted", "id": task_id, "version": version},
+        headers=_consistency_header(version),
+    )
@@ -0,0 +1,60 @@
+"""Fast JSON serialization shared by the service, cache and routes.
+
+Service methods return plain dicts built by `task_to_dict` from trusted ORM
+rows; routes send them with `JSONBytesResponse`, which encodes straight to
+bytes (orjson when installed) instead of re-validating them against the
+pydantic `response_model` and running `jsonable_encoder`.
+"""
+import json
+from datetime import datetime
+from typing import Any
+
+from starlette.responses import Response
+
+from app.db.models import Task
+
+try:
+    import orjson  # type: ignore
+except Exception:  # pragma: no cover - fallback if orjson is not installed
+    orjson = None  # type: ignore
+
+
+def _default(obj):
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Type {type(obj)} not serializable")
+
+
+if orjson:
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=_default)
+
+    loads = orjson.loads
+else:
+    def dumps(obj: Any) -> bytes:
+        return json.dumps(obj, default=_default, separators=(",", ":")).encode()
+
+    loads = json.loads
+
+
+def task_to_dict(task: Task) -> dict:
+    """The one row -> dict mapping used for API responses, cache values and events"""
+    return {
+        "id": task.id,
+        "title": task.title,
+        "description": task.description,
+        "is_completed": task.is_completed,
+        "created_at": task.created_at.isoformat(),
+        "updated_at": task.updated_at.isoformat() if task.updated_at else None,
+        "version": task.version,
+    }
+
+
+class JSONBytesResponse(Response):
+    """JSON response for trusted service output; bytes content is sent as-is"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
@@ -1,22 +1,265 @@
 from datetime import datetime
+import asyncio
+import base64
+import json
 import uuid
 import logging
-from typing import List, Optional
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from sqlalchemy import Boolean, DateTime, String, bindparam, delete, func, insert, or_, tuple_, update
 from sqlalchemy.future import select
-from app.db.models import Task
-from app.db.schemas import TaskCreateRequest, TaskOut
+from app.db.models import OutboxEvent, Task, TaskTombstone
+from app.db.schemas import TaskBatchUpdateItem, TaskCreateRequest, TaskFilters
 from app.db.write_db import async_write_session
-from app.db.read_db import async_read_session
+from app.db.read_db import async_read_primary_session, async_read_session
+from app.config.settings import settings
+from app.serialization import dumps, task_to_dict
 from app.cache.redis_cache import (
-    cache_add_task_async,
+    TASK_INDEX_KEY,
+    cache_add_tasks_async,
+    cache_unwatch_task,
+    cache_watch_task,
+    cache_count_tasks_async,
     cache_get_all_ids_async,
+    cache_get_collection_version_async,
+    cache_get_snapshot_async,
+    cache_get_stale_list_async,
+    cache_get_task_async,
+    cache_get_deleted_version_async,
+    cache_get_task_version_async,
     cache_get_tasks_by_ids_async,
+    cache_mark_snapshot_ready_async,
+    cache_release_lock_async,
     cache_set_index_async,
-    cache_remove_task_async,
+    cache_set_missing_async,
+    cache_set_stale_list_async,
+    cache_remove_tasks_async,
+    cache_try_lock_async,
+    cache_wait_for_unlock_async,
 )
-from app.tasks import sync_task_created, sync_task_deleted, sync_task_updated
+from app.cache.search_index import query_tokens, search_async
+from app.cache.single_flight import single_flight
+from app.event_publisher import event_publisher
+from app.metrics import consistent_reads
 
 logger = logging.getLogger(__name__)
+# Per-task lines on the write path; DEBUG by default so they cost nothing at INFO
+TASK_LOG_LEVEL = logging.getLevelName(settings.TASK_LOG_LEVEL)
+
+
+_BATCH_UPDATE = (
+    update(Task.__table__)
+    .where(Task.id == bindparam("b_id"))
+    .values(
+        title=func.coalesce(bindparam("b_title", type_=String), Task.title),
+        description=func.coalesce(bindparam("b_description", type_=String), Task.description),
+        is_completed=func.coalesce(bindparam("b_is_completed", type_=Boolean), Task.is_completed),
+        updated_at=bindparam("b_updated_at", type_=DateTime),
+        version=Task.version + 1,
+    )
+)
+
+
+class InvalidCursor(ValueError):
+    """A `cursor` query parameter that is not one of ours"""
+
+
+def _encode_cursor(task: Task) -> str:
+    """Opaque keyset cursor pointing just after `task` in (created_at, id) order."""
+    raw = json.dumps([task.created_at.isoformat(), task.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """Raises InvalidCursor for malformed cursors."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, task_id = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(created_at), str(task_id)
+    except (TypeError, ValueError) as e:
+        raise InvalidCursor(f"Invalid cursor: {cursor!r}") from e
+
+
+def _filter_conditions(filters: Optional[TaskFilters]) -> list:
+    if filters is None:
+        return []
+    conditions = []
+    if filters.is_completed is True:
+        conditions.append(Task.is_completed.is_(True))
+    elif filters.is_completed is False:
+        # NULL counts as open, like the cache status sets
+        conditions.append(or_(Task.is_completed.is_(False), Task.is_completed.is_(None)))
+    if filters.created_after is not None:
+        conditions.append(Task.created_at > filters.created_after)
+    if filters.created_before is not None:
+        conditions.append(Task.created_at < filters.created_before)
+    if filters.title_prefix:
+        conditions.append(Task.title.startswith(filters.title_prefix, autoescape=True))
+    return conditions
+
+
+def _keyset_query(cursor: Optional[str], filters: Optional[TaskFilters] = None):
+    stmt = select(Task).where(*_filter_conditions(filters)).order_by(Task.created_at, Task.id)
+    if cursor:
+        created_at, last_id = _decode_cursor(cursor)
+        stmt = stmt.where(tuple_(Task.created_at, Task.id) > tuple_(created_at, last_id))
+    return stmt
+
+
+async def _stream_json_array(stmt) -> AsyncIterator[bytes]:
+    async with async_read_session() as session:
+        result = await session.stream_scalars(stmt)
+        yield b"["
+        first = True
+        async for chunk in result.partitions():
+            body = b",".join(dumps(task_to_dict(task)) for task in chunk)
+            yield body if first else b"," + body
+            first = False
+        yield b"]"
+
+
+async def _get_all_from_cache() -> Optional[List[dict]]:
+    """Serve the list from the index + bulk gets; None when the index is empty"""
+    task_ids = await cache_get_all_ids_async()
+    if not task_ids:
+        return None
+    cached, missing_ids = await cache_get_tasks_by_ids_async(task_ids)
+    # If some are missing due to TTL, refill them from DB
+    if missing_ids:
+        async with async_read_session() as session:
+            result = await session.execute(select(Task).where(Task.id.in_(missing_ids)))
+            refilled = [task_to_dict(task) for task in result.scalars().all()]
+        await cache_add_tasks_async(refilled)
+        cached.extend(refilled)
+        found_ids = {task_data["id"] for task_data in refilled}
+        unknown_ids = [mid for mid in missing_ids if mid not in found_ids]
+        if unknown_ids:
+            # A lagging replica may not have a task yet: only unindex ids the primary
+            # has a tombstone for, and leave the rest out of this response
+            async with async_read_primary_session() as session:
+                result = await session.execute(select(TaskTombstone.id).where(TaskTombstone.id.in_(unknown_ids)))
+                await cache_remove_tasks_async(list(result.scalars().all()))
+    if not cached:
+        return None
+    logger.debug(f"Cache hit: {len(cached)} tasks (with refills: {len(task_ids) - len(missing_ids)})")
+    return cached
+
+
+async def _get_tasks_by_ids(task_ids: List[str]) -> Dict[str, dict]:
+    """Tasks by id from the cache, refilling misses from the read DB; unknown ids are left out"""
+    cached, missing_ids = await cache_get_tasks_by_ids_async(task_ids)
+    if missing_ids:
+        async with async_read_session() as session:
+            result = await session.execute(select(Task).where(Task.id.in_(missing_ids)))
+            refilled = [task_to_dict(task) for task in result.scalars().all()]
+        await cache_add_tasks_async(refilled)
+        cached.extend(refilled)
+    return {task_data["id"]: task_data for task_data in cached}
+
+
+async def _load_all_from_db() -> List[dict]:
+    """Fill both index and items from DB"""
+    async with async_read_session() as session:
+        result = await session.execute(select(Task))
+        tasks_data = [task_to_dict(task) for task in result.scalars().all()]
+    # Values first, then swap the index, so the index never points at unfilled keys
+    await cache_add_tasks_async(tasks_data)
+    await cache_set_index_async([task_data["id"] for task_data in tasks_data])
+    await cache_set_stale_list_async(tasks_data)
+    # Every task is now in the snapshot hash; the projector keeps it current from here on
+    await cache_mark_snapshot_ready_async()
+    logger.info(f"Fetched {len(tasks_data)} tasks from DB and primed cache.")
+    return tasks_data
+
+
+async def _load_task_from_db(task_id: str, remember_missing: bool = True) -> Optional[dict]:
+    async with async_read_session() as session:
+        result = await session.execute(select(Task).where(Task.id == task_id))
+        task = result.scalar_one_or_none()
+    if task is None:
+        if not remember_missing:
+            return None
+        # Remember unknown ids briefly so random-id scans don't all reach the DB
+        await cache_set_missing_async(task_id)
+        return None
+    task_data = task_to_dict(task)
+    await cache_add_tasks_async([task_data])
+    return task_data
+
+
+async def _read_task(task_id: str) -> Optional[dict]:
+    """Cache, then read DB; ignores the negative cache and never sets it (the task
+    may be about to appear)"""
+    task_data, _ = await cache_get_task_async(task_id)
+    if task_data is not None:
+        return task_data
+    return await single_flight(
+        f"task:{task_id}:fresh", lambda: _load_task_from_db(task_id, remember_missing=False)
+    )
+
+
+async def _get_task_at_least(task_id: str, min_version: int) -> Optional[dict]:
+    """Read-your-writes: the task at `min_version` or newer (None if it was deleted).
+
+    Waits up to CONSISTENCY_WAIT_MS for the projector to apply the change, woken by
+    its invalidation message rather than polling, then falls back to one lookup on
+    the write DB.
+    """
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + settings.CONSISTENCY_WAIT_MS / 1000
+    waited = False
+    while True:
+        # Watch before reading so a change applied in between still wakes us
+        waiter = cache_watch_task(task_id)
+        try:
+            task_data = await _read_task(task_id)
+            if task_data is not None and (task_data.get("version") or 1) >= min_version:
+                consistent_reads.inc("waited" if waited else "fresh")
+                return task_data
+            if task_data is None:
+                if waited:
+                    # The change we were woken for removed the task: it was a delete
+                    consistent_reads.inc("waited")
+                    return None
+                deleted_version = await cache_get_deleted_version_async(task_id)
+                if deleted_version is not None and deleted_version >= min_version:
+                    # A delete at or after the token is already projected
+                    consistent_reads.inc("fresh")
+                    return None
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                await asyncio.wait_for(waiter, remaining)
+            except asyncio.TimeoutError:
+                break
+            waited = True
+        finally:
+            cache_unwatch_task(task_id, waiter)
+    # The projector is behind: one targeted lookup on the write model
+    consistent_reads.inc("write_db")
+    async with async_write_session() as session:
+        result = await session.execute(select(Task).where(Task.id == task_id))
+        task = result.scalar_one_or_none()
+    return task_to_dict(task) if task else None
+
+
+async def _refill_all_tasks() -> List[dict]:
+    token = await cache_try_lock_async(TASK_INDEX_KEY)
+    if token is None:
+        # Another process is refilling: serve the last full list, or wait for its refill
+        stale = await cache_get_stale_list_async()
+        if stale is not None:
+            logger.debug(f"Serving {len(stale)} stale tasks while another process refills the cache")
+            return stale
+        if await cache_wait_for_unlock_async(TASK_INDEX_KEY):
+            cached = await _get_all_from_cache()
+            if cached is not None:
+                return cached
+    try:
+        return await _load_all_from_db()
+    finally:
+        if token is not None:
+            await cache_release_lock_async(TASK_INDEX_KEY, token)
 
 
 class TaskService:
@@ -33,101 +276,129 @@ class TaskService:
             is_completed=payload.is_completed,
         )
 
-        logger.info(
-            f'Task Created\nID: {task.id}\nTitle: {task.title}\nDescription: {task.description}'
+        logger.log(
+            TASK_LOG_LEVEL, "Task Created\nID: %s\nTitle: %s\nDescription: %s",
+            task.id, task.title, task.description,
         )
 
         async with async_write_session() as session:
             async with session.begin():
                 session.add(task)
+                # Flush to populate column defaults (created_at/updated_at)
+                await session.flush()
 
-        logger.info(f"Task {task.id} created in write DB.")
-
-        # Convert task to JSON-serializable dict for Celery
-        task_dict = TaskOut.model_validate(task).model_dump(mode="json")
-        logger.debug(f'task_dict for Celery: {task_dict}')
+                task_dict = task_to_dict(task)
+                logger.debug("task_dict for outbox: %s", task_dict)
 
-        # Publish to Celery to update read DB and cache
-        sync_task_created.delay(task_dict)
+                # Recorded in the same transaction; published by event_publisher once
+                # committed (app.outbox_relay if it cannot)
+                event = OutboxEvent(event_type="created", task_id=task.id, payload=task_dict)
+                session.add(event)
 
-        logger.info(f"Task {task.id} published to read DB sync queue.")
+        logger.log(TASK_LOG_LEVEL, "Task %s created in write DB.", task.id)
+        await event_publisher.enqueue([event.id])
 
         return task_dict
     
     @staticmethod
     async def get_all_tasks() -> List[dict]:
-        """Get all tasks with caching"""
-        # 1) Try to serve from cache using index + bulk gets
-        task_ids = await cache_get_all_ids_async()
-        if task_ids:
-            cached, missing_ids = await cache_get_tasks_by_ids_async(task_ids)
-            # If some are missing due to TTL, refill them from DB
-            if missing_ids:
-                async with async_read_session() as session:
-                    result = await session.execute(select(Task).where(Task.id.in_(missing_ids)))
-                    missing_tasks = result.scalars().all()
-                    found_ids = set()
-                    for task in missing_tasks:
-                        task_data = {
-                            "id": task.id,
-                            "title": task.title,
-                            "description": task.description,
-                            "is_completed": task.is_completed,
-                            "created_at": task.created_at.isoformat(),
-                            "updated_at": task.updated_at.isoformat(),
-                        }
-                        found_ids.add(task.id)
-                        await cache_add_task_async(task_data)
-                        cached.append(task_data)
-                    # Clean up index for IDs that no longer exist in DB
-                    for mid in missing_ids:
-                        if mid not in found_ids:
-                            await cache_remove_task_async(mid)
-            if cached:
-                logger.debug(f"Cache hit: {len(cached)} tasks (with refills: {len(task_ids) - len(missing_ids)})")
+        """Get all tasks and build the list snapshot (see get_all_tasks_json)"""
+        # One full fill per process (single flight) and across processes (Redis lock);
+        # once it has run, the snapshot serves the list and this path goes cold
+        return await single_flight(TASK_INDEX_KEY, _refill_all_tasks)
+    
+    @staticmethod
+    async def get_all_tasks_json(is_completed: Optional[bool] = None) -> Optional[bytes]:
+        """All tasks (optionally one status) as pre-serialized JSON from the projector-maintained snapshot"""
+        return await cache_get_snapshot_async(is_completed)
+    
+    @staticmethod
+    async def get_list_version() -> Optional[int]:
+        """Changes whenever the snapshot served by get_all_tasks_json changes (list ETag)"""
+        return await cache_get_collection_version_async()
+    
+    @staticmethod
+    async def get_task_version(task_id: str) -> Optional[int]:
+        """Latest projected version of a task from Redis, without reading the task"""
+        return await cache_get_task_version_async(task_id)
+    
+    @staticmethod
+    async def get_filtered_tasks(filters: TaskFilters) -> List[dict]:
+        """All tasks matching `filters`, ordered by (created_at, id), from the read DB"""
+        async with async_read_session() as session:
+            result = await session.execute(_keyset_query(None, filters))
+            return [task_to_dict(task) for task in result.scalars().all()]
+    
+    @staticmethod
+    async def count_tasks(filters: TaskFilters) -> int:
+        """Count tasks; total and per-status counts come from Redis in O(1) once the snapshot is built"""
+        if filters.status_only():
+            cached = await cache_count_tasks_async(filters.is_completed)
+            if cached is not None:
                 return cached
-
-        # 2) Cache miss: fill both index and items from DB
         async with async_read_session() as session:
-            result = await session.execute(select(Task))
-            tasks = result.scalars().all()
-            if not tasks:
-                return []
-            tasks_data = []
-            ids = []
-            for task in tasks:
-                task_data = {
-                    "id": task.id,
-                    "title": task.title,
-                    "description": task.description,
-                    "is_completed": task.is_completed,
-                    "created_at": task.created_at.isoformat(),
-                    "updated_at": task.updated_at.isoformat(),
-                }
-                ids.append(task.id)
-                tasks_data.append(task_data)
-            await cache_set_index_async(ids)
-            for task_data in tasks_data:
-                await cache_add_task_async(task_data)
-            logger.info(f"Fetched {len(tasks_data)} tasks from DB and primed cache.")
-            return tasks_data
+            result = await session.execute(
+                select(func.count()).select_from(Task).where(*_filter_conditions(filters))
+            )
+            return result.scalar_one()
     
     @staticmethod
-    async def get_task_by_id(task_id: str) -> Optional[dict]:
-        """Get a specific task by ID"""
+    async def get_tasks_page(
+        limit: int, cursor: Optional[str] = None, filters: Optional[TaskFilters] = None
+    ) -> dict:
+        """Get one page of tasks ordered by (created_at, id) using keyset pagination"""
         async with async_read_session() as session:
-            result = await session.execute(select(Task).where(Task.id == task_id))
-            task = result.scalar_one_or_none()
-            if task:
-                return {
-                    "id": task.id,
-                    "title": task.title,
-                    "description": task.description,
-                    "is_completed": task.is_completed,
-                    "created_at": task.created_at.isoformat(),
-                    "updated_at": task.updated_at.isoformat(),
-                }
+            result = await session.execute(_keyset_query(cursor, filters).limit(limit + 1))
+            tasks = result.scalars().all()
+        has_more = len(tasks) > limit
+        tasks = tasks[:limit]
+        return {
+            "items": [task_to_dict(task) for task in tasks],
+            "next_cursor": _encode_cursor(tasks[-1]) if has_more else None,
+        }
+
+    @staticmethod
+    def stream_tasks(
+        cursor: Optional[str] = None, filters: Optional[TaskFilters] = None
+    ) -> AsyncIterator[bytes]:
+        """Stream all (matching) tasks as a chunked JSON array through a server-side cursor"""
+        # Build the query eagerly so a bad cursor fails before the response starts
+        stmt = _keyset_query(cursor, filters).execution_options(
+            yield_per=settings.TASKS_STREAM_CHUNK_SIZE
+        )
+        return _stream_json_array(stmt)
+
+    @staticmethod
+    async def search_tasks(q: str, limit: int, offset: int = 0) -> dict:
+        """Ranked full-text search over titles and descriptions (Redis inverted index)"""
+        total, ranked = await search_async(query_tokens(q), offset, limit)
+        tasks = await _get_tasks_by_ids([task_id for task_id, _ in ranked]) if ranked else {}
+        return {
+            "items": [
+                {**tasks[task_id], "score": round(score, 4)}
+                for task_id, score in ranked
+                if task_id in tasks
+            ],
+            "total": total,
+            "next_offset": offset + limit if offset + limit < total else None,
+        }
+    
+    @staticmethod
+    async def get_task_by_id(task_id: str, min_version: Optional[int] = None) -> Optional[dict]:
+        """Get a specific task by ID (read-through cache).
+
+        With `min_version` (the consistency token returned by a write), never
+        returns an older version; see _get_task_at_least.
+        """
+        if min_version is not None:
+            return await _get_task_at_least(task_id, min_version)
+        task_data, known_missing = await cache_get_task_async(task_id)
+        if task_data is not None:
+            return task_data
+        if known_missing:
             return None
+        # Real miss: concurrent reads of the same id share one DB query
+        return await single_flight(f"task:{task_id}", lambda: _load_task_from_db(task_id))
     
     @staticmethod
     async def update_task(
@@ -137,49 +408,144 @@ class TaskService:
         is_completed: Optional[bool] = None
     ) -> Optional[dict]:
         """Update a specific task by ID"""
+        changes = {
+            field: value
+            for field, value in (("title", title), ("description", description), ("is_completed", is_completed))
+            if value is not None
+        }
         async with async_write_session() as session:
             async with session.begin():
-                result = await session.execute(select(Task).where(Task.id == task_id))
+                # Single round trip: apply the change, bump the version, read the row back
+                result = await session.execute(
+                    update(Task)
+                    .where(Task.id == task_id)
+                    .values(**changes, version=Task.version + 1, updated_at=datetime.utcnow())
+                    .returning(Task)
+                )
                 task = result.scalar_one_or_none()
                 if not task:
                     return None
                 
-                if title is not None:
-                    task.title = title
-                if description is not None:
-                    task.description = description
-                if is_completed is not None:
-                    task.is_completed = is_completed
+                task_dict = task_to_dict(task)
                 
-                # Flush to get updated data
-                await session.flush()
-                
-                # Convert to dict for return
-                task_dict = {
-                    "id": task.id,
-                    "title": task.title,
-                    "description": task.description,
-                    "is_completed": task.is_completed,
-                    "created_at": task.created_at.isoformat(),
-                    "updated_at": datetime.now().isoformat(),
-                }
-                
-                logger.info(f"Task {task_id} updated: {task_dict}")
-                # Publish to Celery to update read DB and cache
-                sync_task_updated.delay(task_dict)
-                return task_dict
+                logger.log(TASK_LOG_LEVEL, "Task %s updated: %s", task_id, task_dict)
+                # Recorded in the same transaction; published once committed
+                event = OutboxEvent(event_type="updated", task_id=task_id, payload=task_dict)
+                session.add(event)
+        await event_publisher.enqueue([event.id])
+        return task_dict
     
     @staticmethod
-    async def delete_task(task_id: str) -> bool:
-        """Delete a specific task by ID"""
+    async def delete_task(task_id: str) -> Optional[int]:
+        """Delete a specific task by ID; returns the delete's version (consistency token) or None"""
         async with async_write_session() as session:
             async with session.begin():
-                result = await session.execute(select(Task).where(Task.id == task_id))
-                task = result.scalar_one_or_none()
-                if not task:
-                    return False
+                result = await session.execute(
+                    delete(Task).where(Task.id == task_id).returning(Task.version)
+                )
+                version = result.scalar_one_or_none()
+                if version is None:
+                    return None
                 
-                await session.delete(task)
-                logger.info(f"Task {task_id} deleted from write DB.")
-                sync_task_deleted.delay(task_id)
-                return True
+                # The delete is a change of its own: it outranks every earlier version
+                event = OutboxEvent(event_type="deleted", task_id=task_id, payload={"version": version + 1})
+                session.add(event)
+                logger.log(TASK_LOG_LEVEL, "Task %s deleted from write DB.", task_id)
+        await event_publisher.enqueue([event.id])
+        return version + 1
+
+    @staticmethod
+    async def create_tasks(payloads: List[TaskCreateRequest]) -> List[dict]:
+        """Create many tasks with multi-row INSERTs in one write transaction"""
+        now = datetime.utcnow()
+        rows = [
+            {
+                "id": str(uuid.uuid4()),
+                "title": payload.title,
+                "description": payload.description,
+                "is_completed": bool(payload.is_completed),
+                "created_at": now,
+                "updated_at": now,
+                "version": 1,
+            }
+            for payload in payloads
+        ]
+        tasks_data = [task_to_dict(Task(**row)) for row in rows]
+        async with async_write_session() as session:
+            async with session.begin():
+                await session.execute(insert(Task), rows)
+                result = await session.execute(insert(OutboxEvent).returning(OutboxEvent.id), [
+                    {"event_type": "created", "task_id": task_data["id"], "payload": task_data, "created_at": now}
+                    for task_data in tasks_data
+                ])
+                event_ids = result.scalars().all()
+        logger.log(TASK_LOG_LEVEL, "Batch created %d tasks in write DB.", len(tasks_data))
+        await event_publisher.enqueue(event_ids)
+        return [
+            {"index": index, "id": task_data["id"], "status": "created", "task": task_data}
+            for index, task_data in enumerate(tasks_data)
+        ]
+
+    @staticmethod
+    async def update_tasks(items: List[TaskBatchUpdateItem]) -> List[dict]:
+        """Update many tasks in one write transaction; unknown ids are reported as not_found"""
+        now = datetime.utcnow()
+        ids = list({item.id for item in items})
+        async with async_write_session() as session:
+            async with session.begin():
+                # One executemany UPDATE; a NULL parameter keeps the current value
+                await session.execute(_BATCH_UPDATE, [
+                    {
+                        "b_id": item.id,
+                        "b_title": item.title,
+                        "b_description": item.description,
+                        "b_is_completed": item.is_completed,
+                        "b_updated_at": now,
+                    }
+                    for item in items
+                ])
+                result = await session.execute(
+                    select(Task).where(Task.id.in_(ids)).execution_options(populate_existing=True)
+                )
+                updated = {task.id: task_to_dict(task) for task in result.scalars().all()}
+                event_ids = []
+                if updated:
+                    result = await session.execute(insert(OutboxEvent).returning(OutboxEvent.id), [
+                        {"event_type": "updated", "task_id": task_id, "payload": task_data, "created_at": now}
+                        for task_id, task_data in updated.items()
+                    ])
+                    event_ids = result.scalars().all()
+        logger.log(TASK_LOG_LEVEL, "Batch updated %d tasks in write DB.", len(updated))
+        await event_publisher.enqueue(event_ids)
+        return [
+            {"index": index, "id": item.id, "status": "updated", "task": updated[item.id]}
+            if item.id in updated else
+            {"index": index, "id": item.id, "status": "not_found"}
+            for index, item in enumerate(items)
+        ]
+
+    @staticmethod
+    async def delete_tasks(task_ids: List[str]) -> List[dict]:
+        """Delete many tasks with one DELETE ... WHERE id IN (...)"""
+        now = datetime.utcnow()
+        async with async_write_session() as session:
+            async with session.begin():
+                result = await session.execute(
+                    delete(Task).where(Task.id.in_(set(task_ids))).returning(Task.id, Task.version)
+                )
+                deleted = {task_id: version for task_id, version in result.all()}
+                event_ids = []
+                if deleted:
+                    result = await session.execute(insert(OutboxEvent).returning(OutboxEvent.id), [
+                        {"event_type": "deleted", "task_id": task_id, "payload": {"version": version + 1}, "created_at": now}
+                        for task_id, version in deleted.items()
+                    ])
+                    event_ids = result.scalars().all()
+        logger.log(TASK_LOG_LEVEL, "Batch deleted %d tasks from write DB.", len(deleted))
+        await event_publisher.enqueue(event_ids)
+        return [
+            {"index": index, "id": task_id, "status": "deleted", "version": deleted[task_id] + 1}
+            if task_id in deleted else
+            {"index": index, "id": task_id, "status": "not_found"}
+            for index, task_id in enumerate(task_ids)
+        ]
@@ -1,71 +1,72 @@
 from app.celery_app import celery_app
-from app.db.read_db_sync import SyncSessionLocal
-from app.db.models import Task
-from app.cache.redis_cache import (
-    cache_add_task_sync,
-    cache_remove_task_sync,
-)
+from app.config.settings import settings
+from app.projection import apply_events_sync
 import logging
-from datetime import datetime
+from typing import List
 
 logger = logging.getLogger(__name__)
+# Per-event progress lines; errors are always logged
+TASK_LOG_LEVEL = logging.getLevelName(settings.TASK_LOG_LEVEL)
 
-
-def _normalize_task_datetime(task_data: dict) -> dict:
-    if isinstance(task_data.get("created_at"), str):
-        task_data["created_at"] = datetime.fromisoformat(task_data["created_at"])
-    return task_data
+# The relay deletes outbox rows once the broker has the message, so a batch must
+# not be dropped on failure: raise, keep the message unacknowledged until the task
+# finishes, and retry it. The projection is version-guarded, so replays are safe.
+PROJECTION_RETRY = dict(
+    autoretry_for=(Exception,),
+    retry_backoff=True,
+    retry_backoff_max=settings.PROJECTION_RETRY_BACKOFF_MAX_SECONDS,
+    retry_jitter=True,
+    max_retries=settings.PROJECTION_MAX_RETRIES,
+    acks_late=True,
+    reject_on_worker_lost=True,
+)
 
 
-@celery_app.task(name="sync_task_created")
+# Single-event tasks are kept for messages enqueued before the outbox relay;
+# they go through the same version-guarded projection as sync_task_events.
+@celery_app.task(name="sync_task_created", **PROJECTION_RETRY)
 def sync_task_created(task_data: dict):
-    logger.info(f"🔄 Sync create into read DB: {task_data}")
-    db = SyncSessionLocal()
+    logger.log(TASK_LOG_LEVEL, "🔄 Sync create into read DB: %s", task_data)
     try:
-        task_data = _normalize_task_datetime(task_data)
-        task = Task(**task_data)
-        db.merge(task)
-        db.commit()
-        cache_add_task_sync(task_data)
-        logger.info(f"✅ Created task synced: {task.id}")
+        apply_events_sync([{"type": "created", "task_id": task_data["id"], "data": task_data}])
+        logger.log(TASK_LOG_LEVEL, "✅ Created task synced: %s", task_data["id"])
     except Exception as e:
-        logger.error(f"❌ Error syncing create: {e}")
-        db.rollback()
-    finally:
-        db.close()
+        logger.error(f"❌ Error syncing create, retrying: {e}")
+        raise
 
 
-@celery_app.task(name="sync_task_updated")
+@celery_app.task(name="sync_task_updated", **PROJECTION_RETRY)
 def sync_task_updated(task_data: dict):
-    logger.info(f"🔄 Sync update into read DB: {task_data}")
-    db = SyncSessionLocal()
+    logger.log(TASK_LOG_LEVEL, "🔄 Sync update into read DB: %s", task_data)
     try:
-        task_data = _normalize_task_datetime(task_data)
-        task = Task(**task_data)
-        db.merge(task)
-        db.commit()
-        cache_add_task_sync(task_data)
-        logger.info(f"✅ Updated task synced: {task.id}")
+        apply_events_sync([{"type": "updated", "task_id": task_data["id"], "data": task_data}])
+        logger.log(TASK_LOG_LEVEL, "✅ Updated task synced: %s", task_data["id"])
     except Exception as e:
-        logger.error(f"❌ Error syncing update: {e}")
-        db.rollback()
-    finally:
-        db.close()
+        logger.error(f"❌ Error syncing update, retrying: {e}")
+        raise
 
 
-@celery_app.task(name="sync_task_deleted")
+@celery_app.task(name="sync_task_deleted", **PROJECTION_RETRY)
 def sync_task_deleted(task_id: str):
-    logger.info(f"🔄 Sync delete from read DB: {task_id}")
-    db = SyncSessionLocal()
+    logger.log(TASK_LOG_LEVEL, "🔄 Sync delete from read DB: %s", task_id)
+    try:
+        apply_events_sync([{"type": "deleted", "task_id": task_id, "data": None}])
+        logger.log(TASK_LOG_LEVEL, "✅ Deleted task synced: %s", task_id)
+    except Exception as e:
+        logger.error(f"❌ Error syncing delete, retrying: {e}")
+        raise
+
+
+@celery_app.task(name="sync_task_events", **PROJECTION_RETRY)
+def sync_task_events(events: List[dict]):
+    """Apply a batch of outbox events published by app.outbox_relay"""
+    logger.log(TASK_LOG_LEVEL, "🔄 Sync %d outbox events into read DB", len(events))
     try:
-        obj = db.get(Task, task_id)
-        if obj:
-            db.delete(obj)
-            db.commit()
-        cache_remove_task_sync(task_id)
-        logger.info(f"✅ Deleted task synced: {task_id}")
+        upserted, deleted = apply_events_sync(events)
+        logger.log(
+            TASK_LOG_LEVEL, "✅ Outbox events synced up to seq %s (%d upserted, %d deleted)",
+            events[-1]["seq"], upserted, deleted,
+        )
     except Exception as e:
-        logger.error(f"❌ Error syncing delete: {e}")
-        db.rollback()
-    finally:
-        db.close()
+        logger.error(f"❌ Error syncing outbox events, retrying: {e}")
+        raise
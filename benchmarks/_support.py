@@ -0,0 +1,48 @@
+"""Shared helpers for the benchmark scripts (not imported by the app)."""
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import List
+
+
+def use_fake_redis() -> None:
+    """Point app.cache.redis_cache at an in-process fakeredis server.
+
+    Requires `pip install fakeredis` (plus `lupa` for Lua scripts).
+    """
+    import fakeredis
+    from app.cache import redis_cache
+
+    server = fakeredis.FakeServer()
+    for name in ("_sync_client", "_async_client", "_async_raw_client"):
+        client = getattr(redis_cache, name, None)
+        if client is None:
+            continue
+        decode = client.connection_pool.connection_kwargs.get("decode_responses", False)
+        fake_cls = fakeredis.aioredis.FakeRedis if name.startswith("_async") else fakeredis.FakeRedis
+        setattr(redis_cache, name, fake_cls(server=server, decode_responses=decode))
+
+
+def make_task_dicts(count: int, description_size: int = 80) -> List[dict]:
+    base = datetime(2025, 1, 1)
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "title": f"Benchmark task {i}",
+            "description": ("lorem ipsum " * (description_size // 12 + 1))[:description_size],
+            "is_completed": i % 3 == 0,
+            "created_at": (base + timedelta(seconds=i)).isoformat(),
+            "updated_at": (base + timedelta(seconds=i)).isoformat(),
+            "version": 1,
+        }
+        for i in range(count)
+    ]
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
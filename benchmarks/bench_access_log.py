@@ -0,0 +1,86 @@
+"""Access-log overhead: the old BaseHTTPMiddleware (two INFO lines per request)
+vs the pure-ASGI LoggingMiddleware in each mode.
+
+Requests are driven straight through the ASGI interface against a trivial
+Starlette app; log output goes to /dev/null. No database or Redis needed:
+
+    python -m benchmarks.bench_access_log --requests 20000
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+
+class _OldLoggingMiddleware(BaseHTTPMiddleware):
+    """The pre-change middleware, kept here as the baseline"""
+
+    async def dispatch(self, request, call_next):
+        logger = logging.getLogger("bench.old")
+        start_time = time.time()
+        logger.info(f"Request: {request.method} {request.url}")
+        response = await call_next(request)
+        logger.info(f"Response: {response.status_code} - Processed in {time.time() - start_time:.4f}s")
+        return response
+
+
+async def _ok(request):
+    return PlainTextResponse("ok")
+
+
+async def _drive(app, requests: int) -> float:
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+        "scheme": "http", "path": "/tasks", "raw_path": b"/tasks", "query_string": b"",
+        "root_path": "", "headers": [(b"host", b"bench")], "server": ("bench", 80), "client": ("c", 1),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    start = time.process_time()
+    for _ in range(requests):
+        await app(dict(scope), receive, send)
+    return (time.process_time() - start) / requests
+
+
+def run(args) -> None:
+    from app.middleware.logging_middleware import LoggingMiddleware
+
+    handler = logging.StreamHandler(open(os.devnull, "w"))
+    logging.basicConfig(level=logging.INFO, handlers=[handler], force=True)
+
+    def app_with(middleware=None, **kwargs):
+        app = Starlette(routes=[Route("/tasks", _ok)])
+        if middleware:
+            app.add_middleware(middleware, **kwargs)
+        return app
+
+    cases = [
+        ("no middleware", app_with()),
+        ("BaseHTTPMiddleware (old)", app_with(_OldLoggingMiddleware)),
+        ("pure ASGI, all", app_with(LoggingMiddleware, mode="all")),
+        ("pure ASGI, sampled 1%", app_with(LoggingMiddleware, mode="sampled", sample_rate=0.01)),
+        ("pure ASGI, slow only", app_with(LoggingMiddleware, mode="slow")),
+    ]
+    for name, app in cases:
+        per_request = asyncio.run(_drive(app, args.requests))
+        print(f"{name:>26}: {per_request * 1e6:7.1f}us CPU per request")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Cold cache refill: per-task SET + SADD vs pipelined cache_add_tasks_async.
+
+Counts Redis round trips and wall time. Uses REDIS_URL (use a scratch DB) or an
+in-process fakeredis server; `--rtt-ms` adds simulated network latency per
+round trip so the fakeredis numbers resemble a remote Redis:
+
+    python -m benchmarks.bench_cache_fill --fake-redis --tasks 50000 --rtt-ms 0.2
+"""
+import argparse
+import asyncio
+import json
+from benchmarks._support import Timer, make_task_dicts, use_fake_redis
+
+
+class RoundTripCounter:
+    """Wraps an async client so every command / pipeline execute counts as one round trip"""
+
+    def __init__(self, client, rtt_seconds: float):
+        self.count = 0
+        self._rtt = rtt_seconds
+        counter = self
+        original_execute_command = client.execute_command
+        original_pipeline = client.pipeline
+
+        async def execute_command(*args, **kwargs):
+            await counter.hit()
+            return await original_execute_command(*args, **kwargs)
+
+        def pipeline(*args, **kwargs):
+            pipe = original_pipeline(*args, **kwargs)
+            original_execute = pipe.execute
+
+            async def execute(*a, **kw):
+                await counter.hit()
+                return await original_execute(*a, **kw)
+
+            pipe.execute = execute
+            return pipe
+
+        client.execute_command = execute_command
+        client.pipeline = pipeline
+
+    async def hit(self):
+        self.count += 1
+        if self._rtt:
+            await asyncio.sleep(self._rtt)
+
+
+async def run(args) -> None:
+    from app.cache import redis_cache
+
+    tasks = make_task_dicts(args.tasks)
+    counter = RoundTripCounter(redis_cache._async_client, args.rtt_ms / 1000)
+
+    async def clear():
+        await redis_cache.cache_remove_tasks_async([task["id"] for task in tasks])
+        counter.count = 0
+
+    await clear()
+    client = redis_cache._async_client
+    with Timer() as looped:
+        # What a cold refill cost before the bulk API: two round trips per task
+        for task in tasks:
+            await client.set(redis_cache._task_key(task["id"]), json.dumps(task), ex=redis_cache.CACHE_TTL_SECONDS)
+            await client.sadd(redis_cache.TASK_INDEX_KEY, task["id"])
+    looped_trips = counter.count
+
+    await clear()
+    with Timer() as bulk:
+        await redis_cache.cache_add_tasks_async(tasks)
+    bulk_trips = counter.count
+
+    cached, missing = await redis_cache.cache_get_tasks_by_ids_async([task["id"] for task in tasks])
+    assert not missing and len(cached) == len(tasks)
+    await clear()
+
+    print(f"tasks: {len(tasks)}  pipeline chunk: {redis_cache.CACHE_PIPELINE_CHUNK_SIZE}  rtt: {args.rtt_ms}ms")
+    print(f"per-task loop : {looped_trips:8d} round trips  {looped.elapsed:8.3f}s")
+    print(f"pipelined bulk: {bulk_trips:8d} round trips  {bulk.elapsed:8.3f}s")
+    print(f"reduction     : {looped_trips / max(bulk_trips, 1):8.0f}x round trips, "
+          f"{looped.elapsed / bulk.elapsed:.1f}x time")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=10000)
+    parser.add_argument("--rtt-ms", type=float, default=0.0, help="simulated latency per round trip")
+    parser.add_argument("--fake-redis", action="store_true", help="use an in-process fakeredis server")
+    args = parser.parse_args()
+    if args.fake_redis:
+        use_fake_redis()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Change feed fan-out: memory per idle SSE client and time to deliver events to all of them.
+
+N clients run the real `stream_changes` body (as the SSE endpoint does) against
+an in-process fakeredis; events are then published through the per-process
+`ChangeFeed` in batches, as the channel subscription would. Needs fakeredis:
+
+    python -m benchmarks.bench_change_feed --clients 5000 --events 200
+"""
+import argparse
+import asyncio
+import gc
+import time
+import tracemalloc
+from benchmarks._support import make_task_dicts, use_fake_redis
+
+
+async def _consume(stream, received: list) -> None:
+    async for chunk in stream:
+        # A chunk carries every frame that was buffered for the client
+        received[0] += chunk.count(b"\n\n")
+
+
+async def run(args) -> None:
+    from app.change_feed import _event_frame, change_feed, stream_changes
+    from app.serialization import dumps
+
+    received = [0]
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    consumers = [asyncio.create_task(_consume(stream_changes(), received)) for _ in range(args.clients)]
+    while change_feed.client_count < args.clients or received[0] < 2 * args.clients:
+        # Each client has sent its retry and ready frames and is parked on its queue
+        await asyncio.sleep(0.01)
+    gc.collect()
+    per_client = (tracemalloc.get_traced_memory()[0] - before) / args.clients
+    tracemalloc.stop()
+    print(f"{args.clients} idle clients: {per_client / 1024:.1f} KiB each")
+
+    tasks = make_task_dicts(args.events)
+    events = [
+        dumps({"seq": seq, "type": "updated", "id": task["id"], "version": 2, "task": task}).decode()
+        for seq, task in enumerate(tasks, start=1)
+    ]
+    expected = received[0] + args.clients * args.events
+    start = time.perf_counter()
+    for offset in range(0, len(events), args.batch_size):
+        change_feed.publish([_event_frame(event) for event in events[offset:offset + args.batch_size]])
+        await asyncio.sleep(0)
+    publish_done = time.perf_counter()
+    while received[0] < expected:
+        await asyncio.sleep(0.001)
+    elapsed = time.perf_counter() - start
+    deliveries = args.clients * args.events
+    print(
+        f"{args.events} events to {args.clients} clients: fan-out {(publish_done - start) * 1000:.1f}ms, "
+        f"all delivered in {elapsed * 1000:.1f}ms ({deliveries / elapsed:,.0f} deliveries/s)"
+    )
+    for consumer in consumers:
+        consumer.cancel()
+    await asyncio.gather(*consumers, return_exceptions=True)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=5000)
+    parser.add_argument("--events", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=50, help="events per channel message")
+    args = parser.parse_args()
+    use_fake_redis()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
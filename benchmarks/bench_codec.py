@@ -0,0 +1,105 @@
+"""Cache codecs for task:{id} values: stored bytes and encode/decode throughput.
+
+Compares legacy JSON, msgpack with short field names, and msgpack + zlib
+(above CACHE_COMPRESS_MIN_BYTES) on tasks with short, medium and long
+descriptions made of random words, then the Redis payload per task across
+every key that holds it (task:{id}, the tasks:snapshot hash, the index, status
+sets and versions, and the compressed tasks:list:stale). No Redis needed:
+
+    python -m benchmarks.bench_codec --tasks 5000
+"""
+import argparse
+import random
+import time
+from benchmarks._support import make_task_dicts
+
+_WORDS = (
+    "task review deploy fix update client report meeting draft budget schedule "
+    "invoice release migrate database cache index query latency follow call "
+    "design sprint backlog ticket customer feedback test refactor document plan"
+).split()
+
+
+def _tasks(count: int, description_size: int):
+    rng = random.Random(description_size)
+    tasks = make_task_dicts(count, description_size=0)
+    for task in tasks:
+        words = []
+        while sum(len(w) + 1 for w in words) < description_size:
+            words.append(rng.choice(_WORDS))
+        task["description"] = " ".join(words)[:description_size]
+    return tasks
+
+
+def _measure(encode, decode, tasks):
+    start = time.process_time()
+    encoded = [encode(task) for task in tasks]
+    encode_s = time.process_time() - start
+    start = time.process_time()
+    for raw in encoded:
+        decode(raw)
+    decode_s = time.process_time() - start
+    total = sum(len(raw) for raw in encoded)
+    return total / len(tasks), len(tasks) / encode_s, len(tasks) / decode_s
+
+
+def run(args) -> None:
+    from app.cache import codec
+
+    if codec.msgpack is None:
+        raise SystemExit("msgpack is not installed")
+
+    def msgpack_plain(task):
+        threshold = codec.CACHE_COMPRESS_MIN_BYTES
+        codec.CACHE_COMPRESS_MIN_BYTES = 1 << 62
+        try:
+            return codec._pack(task)
+        finally:
+            codec.CACHE_COMPRESS_MIN_BYTES = threshold
+
+    codecs = [
+        ("json (legacy)", codec._ENCODERS["json"]),
+        ("msgpack", msgpack_plain),
+        (f"msgpack+zlib>={codec.CACHE_COMPRESS_MIN_BYTES}", codec._pack),
+    ]
+    print(f"tasks per run: {args.tasks}")
+    print(f"{'description':>11}  {'codec':<22} {'bytes/task':>10} {'vs json':>8} {'encode/s':>10} {'decode/s':>10}")
+    for size in args.description_sizes:
+        tasks = _tasks(args.tasks, size)
+        baseline = None
+        for name, encode in codecs:
+            per_task, enc_rate, dec_rate = _measure(encode, codec.decode_task, tasks)
+            baseline = baseline or per_task
+            print(f"{size:>11}  {name:<22} {per_task:>10.0f} {per_task / baseline:>7.0%} "
+                  f"{enc_rate:>10.0f} {dec_rate:>10.0f}")
+
+    # Payload bytes only; Redis adds per-key and per-field overhead on top
+    print()
+    print("Redis payload per task (bytes). task:{id} and the tasks:snapshot value hold the same codec")
+    print("bytes; task:{id} expires after CACHE_TTL_SECONDS, so a cold task only has the snapshot copy.")
+    print("Baseline = JSON task:{id} + index member; +stale = compressed tasks:list:stale share after a refill")
+    print(f"{'description':>11}  {'codec':<22} {'value':>6} {'ids':>5} {'cold':>6} {'hot':>6} "
+          f"{'cold/base':>9} {'hot/base':>8} {'+stale':>6}")
+    for size in args.description_sizes:
+        tasks = _tasks(args.tasks, size)
+        json_size = sum(len(codec._ENCODERS["json"](task)) for task in tasks) / len(tasks)
+        # Index, completed/open set members and the tasks:versions field and value
+        ids = sum(3 * len(task["id"]) + len(task["id"]) + len(str(task["version"])) for task in tasks) / len(tasks)
+        stale = len(codec.encode_task_list(tasks)) / len(tasks)
+        baseline = json_size + len(tasks[0]["id"])
+        for name, encode in codecs:
+            value = sum(len(encode(task)) for task in tasks) / len(tasks)
+            cold, hot = value + ids, 2 * value + ids
+            print(f"{size:>11}  {name:<22} {value:>6.0f} {ids:>5.0f} {cold:>6.0f} {hot:>6.0f} "
+                  f"{cold / baseline:>8.0%} {hot / baseline:>7.0%} {stale:>6.0f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=5000)
+    parser.add_argument("--description-sizes", type=int, nargs="+", default=[80, 600, 4000])
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Hot-path cost of metrics recording: per-call CPU of the operations a request pays.
+
+No database or Redis needed:
+
+    python -m benchmarks.bench_metrics --calls 1000000
+"""
+import argparse
+import time
+
+
+def _cpu_per_call(fn, calls: int) -> float:
+    start = time.process_time()
+    for _ in range(calls):
+        fn()
+    return (time.process_time() - start) / calls
+
+
+def run(args) -> None:
+    from app.metrics import Counter, Histogram
+
+    histogram = Histogram("bench_seconds", "bench", ("method", "route", "status"))
+    counter = Counter("bench_total", "bench", ("layer", "result"))
+    clock = time.perf_counter
+
+    def request_timing():
+        # What MetricsMiddleware adds per request: two clock reads and one observe
+        start = clock()
+        histogram.observe(clock() - start, "GET", "/v1/tasks/{task_id}", "200")
+
+    cases = {
+        "empty loop": lambda: None,
+        "counter inc": lambda: counter.inc("task", "hit"),
+        "request timing": request_timing,
+    }
+    for name, fn in cases.items():
+        print(f"{name:>15}: {_cpu_per_call(fn, args.calls) * 1e9:8.0f}ns per call")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=1000000)
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Search latency at scale: index N synthetic tasks, then time ranked queries.
+
+Uses REDIS_URL (use a scratch DB: all `search:*` keys are dropped) or an
+in-process fakeredis server (much slower than a real Redis):
+
+    REDIS_URL=redis://localhost:6379/15 python -m benchmarks.bench_search --tasks 300000
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+from benchmarks._support import Timer, make_task_dicts, use_fake_redis
+
+_VOCABULARY = [f"word{i}" for i in range(5000)]
+
+
+def _tasks(count: int):
+    rng = random.Random(42)
+
+    def pick():
+        # Zipf-like word choice so some terms are common and most are rare
+        return _VOCABULARY[min(int(rng.paretovariate(1.1)) - 1, len(_VOCABULARY) - 1)]
+
+    tasks = make_task_dicts(count, description_size=0)
+    for task in tasks:
+        task["title"] = " ".join(pick() for _ in range(4))
+        task["description"] = " ".join(pick() for _ in range(20))
+    return tasks
+
+
+async def _time_queries(queries, limit):
+    from app.cache.search_index import query_tokens, search_async
+
+    timings = []
+    for q in queries:
+        start = time.perf_counter()
+        await search_async(query_tokens(q), 0, limit)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run(args) -> None:
+    from app.cache.search_index import search_index_apply_sync, search_index_clear_sync
+
+    search_index_clear_sync()
+    tasks = _tasks(args.tasks)
+    with Timer() as indexing:
+        for start in range(0, len(tasks), 1000):
+            search_index_apply_sync(tasks[start:start + 1000], [])
+    print(f"indexed {len(tasks)} tasks in {indexing.elapsed:.1f}s")
+
+    rng = random.Random(7)
+    workloads = {
+        "common term": ["word0", "word1", "word2"],
+        "rare term": [f"word{rng.randrange(500, 5000)}" for _ in range(50)],
+        "two terms": [f"word{rng.randrange(0, 50)} word{rng.randrange(0, 500)}" for _ in range(50)],
+    }
+    for name, queries in workloads.items():
+        timings = sorted(asyncio.run(_time_queries(queries * args.repeat, args.limit)))
+        p95 = timings[int(len(timings) * 0.95) - 1]
+        print(f"{name:>12}: p50 {statistics.median(timings) * 1000:7.2f}ms  p95 {p95 * 1000:7.2f}ms")
+    search_index_clear_sync()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=100000)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--fake-redis", action="store_true", help="use an in-process fakeredis server")
+    args = parser.parse_args()
+    if args.fake_redis:
+        use_fake_redis()
+    run(args)
+
+
+if __name__ == "__main__":
+    main()
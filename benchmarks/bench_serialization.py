@@ -0,0 +1,84 @@
+"""Response serialization CPU per request: the old pydantic round trips vs task_to_dict + JSONBytesResponse.
+
+No database or Redis needed; ORM rows are built in memory:
+
+    python -m benchmarks.bench_serialization --tasks 1000 --repeat 200
+
+The "before" path mirrors what a request used to cost: `TaskOut.model_validate(row)
+.model_dump(mode="json")` in the service, then FastAPI validating that dict against
+`response_model`, `jsonable_encoder` and a `JSONResponse` render.
+"""
+import argparse
+import time
+from datetime import datetime
+from typing import List
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from benchmarks._support import make_task_dicts
+
+
+def _rows(count: int):
+    from app.db.models import Task
+
+    rows = []
+    for task in make_task_dicts(count):
+        task = dict(task)
+        task["created_at"] = datetime.fromisoformat(task["created_at"])
+        task["updated_at"] = datetime.fromisoformat(task["updated_at"])
+        rows.append(Task(**task))
+    return rows
+
+
+def _cpu_per_call(fn, repeat: int) -> float:
+    fn()
+    start = time.process_time()
+    for _ in range(repeat):
+        fn()
+    return (time.process_time() - start) / repeat
+
+
+def run(args) -> None:
+    from app.db.schemas import TaskOut
+    from app.serialization import JSONBytesResponse, orjson, task_to_dict
+
+    rows = _rows(args.tasks)
+    one = rows[0]
+    single_model = TypeAdapter(TaskOut)
+    list_model = TypeAdapter(List[TaskOut])
+
+    def before_single():
+        data = TaskOut.model_validate(one).model_dump(mode="json")
+        validated = single_model.validate_python(data)
+        return JSONResponse(jsonable_encoder(single_model.dump_python(validated, mode="json"))).body
+
+    def after_single():
+        return JSONBytesResponse(task_to_dict(one)).body
+
+    def before_list():
+        data = [TaskOut.model_validate(row).model_dump(mode="json") for row in rows]
+        validated = list_model.validate_python(data)
+        return JSONResponse(jsonable_encoder(list_model.dump_python(validated, mode="json"))).body
+
+    def after_list():
+        return JSONBytesResponse([task_to_dict(row) for row in rows]).body
+
+    print(f"encoder: {'orjson' if orjson else 'stdlib json'}  list size: {len(rows)}  repeat: {args.repeat}")
+    for name, before, after, repeat in (
+        ("single task", before_single, after_single, args.repeat * 100),
+        (f"{len(rows)} tasks", before_list, after_list, args.repeat),
+    ):
+        old = _cpu_per_call(before, repeat)
+        new = _cpu_per_call(after, repeat)
+        print(f"{name:>12}: before {old * 1e6:10.1f}us  after {new * 1e6:10.1f}us  ({old / new:.1f}x)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    main()
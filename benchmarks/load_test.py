@@ -0,0 +1,414 @@
+"""Load test: concurrent virtual users against the API, reported per endpoint.
+
+Reports throughput and p50/p95/p99 latency per endpoint, cache hit ratios,
+projector events per second, replication lag, outbox events published by the
+API's event publisher and event loop lag, and writes everything as JSON
+so runs can be compared.
+
+In-process against local stand-ins (default): SQLite (aiosqlite) for both DBs in
+a temp dir, fakeredis, Celery eager and the outbox relay as a background task
+(needs `pip install httpx aiosqlite fakeredis lupa`):
+
+    python -m benchmarks.load_test --duration 30 --users 20
+
+`--real-redis` uses REDIS_URL instead of fakeredis; `--celery worker` leaves Celery
+non-eager for a local `celery -A app.celery_app worker` (needs --real-redis and
+the DB URLs printed at startup). Against a running server (uvicorn or docker
+compose; projector throughput is then not measured):
+
+    python -m benchmarks.load_test --url http://localhost:8000 --duration 60
+
+Compare with an earlier run; exits with status 1 if any endpoint's throughput
+drops or p95 grows by more than --max-regression:
+
+    python -m benchmarks.load_test --baseline benchmarks/results/load_test_X.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List, Optional
+
+_WORDS = "report deploy budget review invoice release migrate meeting design backlog".split()
+_METRIC_LINE = re.compile(r"^([a-zA-Z_:][a-zA-Z0-9_:]*)(\{[^}]*\})?\s+(\S+)$")
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(q * (len(sorted_values) - 1))), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def call(self, client, label: str, method: str, url: str, expected=(200, 201), **kwargs):
+        start = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.latencies[label].append(time.perf_counter() - start)
+        if response.status_code not in expected:
+            self.errors[label] += 1
+        return response
+
+    def summary(self, elapsed: float) -> Dict[str, dict]:
+        endpoints = {}
+        for label, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            endpoints[label] = {
+                "requests": len(values),
+                "errors": self.errors.get(label, 0),
+                "throughput_rps": round(len(values) / elapsed, 2),
+                "mean_ms": round(sum(values) / len(values) * 1000, 3),
+                "p50_ms": round(_percentile(values, 0.50) * 1000, 3),
+                "p95_ms": round(_percentile(values, 0.95) * 1000, 3),
+                "p99_ms": round(_percentile(values, 0.99) * 1000, 3),
+            }
+        return endpoints
+
+
+async def _user(client, recorder: Recorder, stop_at: float, rng: random.Random) -> None:
+    """One virtual user: the stress_test.js flow plus the newer read paths"""
+    call = recorder.call
+    while time.perf_counter() < stop_at:
+        word = rng.choice(_WORDS)
+        created = await call(client, "POST /tasks", "POST", "/v1/tasks/", json={
+            "title": f"{word} task {rng.randrange(1_000_000)}",
+            "description": " ".join(rng.choice(_WORDS) for _ in range(12)),
+        })
+        if created.status_code != 201:
+            continue
+        task_id = created.json()["id"]
+        token = created.headers.get("x-consistency-token", "1")
+        await call(client, "GET /tasks/{id}?min_version", "GET", f"/v1/tasks/{task_id}?min_version={token}")
+        listed = await call(client, "GET /tasks", "GET", "/v1/tasks/")
+        if "etag" in listed.headers:
+            # A polling client: revalidate, usually 304 until the next write is projected
+            await call(client, "GET /tasks If-None-Match", "GET", "/v1/tasks/", expected=(200, 304),
+                       headers={"If-None-Match": listed.headers["etag"]})
+        await call(client, "GET /tasks?limit", "GET", "/v1/tasks/?limit=50")
+        for _ in range(3):
+            await call(client, "GET /tasks/{id}", "GET", f"/v1/tasks/{task_id}")
+        await call(client, "GET /tasks/count", "GET", "/v1/tasks/count?is_completed=false")
+        await call(client, "GET /tasks/search", "GET", f"/v1/tasks/search?q={word}")
+        await call(client, "PUT /tasks/{id}", "PUT", f"/v1/tasks/{task_id}", json={"is_completed": True})
+        if rng.random() < 0.5:
+            await call(client, "DELETE /tasks/{id}", "DELETE", f"/v1/tasks/{task_id}")
+
+
+def _parse_metrics(text: str) -> Dict[str, float]:
+    samples = {}
+    for line in text.splitlines():
+        match = _METRIC_LINE.match(line)
+        if match:
+            samples[match.group(1) + (match.group(2) or "")] = float(match.group(3))
+    return samples
+
+
+def _delta(after: Dict[str, float], before: Dict[str, float], key: str) -> float:
+    return after.get(key, 0.0) - before.get(key, 0.0)
+
+
+def _hit_ratio(hits: float, misses: float) -> Optional[float]:
+    return round(hits / (hits + misses), 4) if hits + misses else None
+
+
+def _cache_summary(after: Dict[str, float], before: Dict[str, float]) -> dict:
+    summary = {}
+    for layer in ("task", "snapshot"):
+        hits = _delta(after, before, f'cache_requests_total{{layer="{layer}",result="hit"}}')
+        misses = _delta(after, before, f'cache_requests_total{{layer="{layer}",result="miss"}}')
+        summary[f"redis_{layer}"] = {"hits": hits, "misses": misses, "hit_ratio": _hit_ratio(hits, misses)}
+    hits = _delta(after, before, 'l1_cache_requests_total{result="hit"}')
+    misses = _delta(after, before, 'l1_cache_requests_total{result="miss"}')
+    if hits or misses:
+        summary["l1"] = {"hits": hits, "misses": misses, "hit_ratio": _hit_ratio(hits, misses)}
+    return summary
+
+
+def _event_publisher_summary(after: Dict[str, float], before: Dict[str, float]) -> dict:
+    """Outbox events published from the API process, vs left to the relay"""
+    return {
+        result: _delta(after, before, f'event_publisher_events_total{{result="{result}"}}')
+        for result in ("published", "relayed", "overflow", "failed")
+    }
+
+
+def _lag_summary(
+    after: Dict[str, float],
+    before: Dict[str, float],
+    name: str = "replication_lag_seconds",
+    count_key: str = "events",
+) -> dict:
+    """Mean and bucket-resolution quantiles of an unlabelled histogram over the run"""
+    buckets = []
+    for key in after:
+        match = re.match(re.escape(name) + r'_bucket\{le="([^"]+)"\}', key)
+        if match:
+            buckets.append((float(match.group(1)), _delta(after, before, key)))
+    buckets.sort()
+    count = _delta(after, before, f"{name}_count")
+    if not count:
+        return {count_key: 0}
+
+    def quantile(q: float) -> float:
+        for bound, cumulative in buckets:
+            if cumulative >= q * count:
+                return bound
+        return float("inf")
+
+    return {
+        count_key: int(count),
+        "mean_s": round(_delta(after, before, f"{name}_sum") / count, 4),
+        "p50_le_s": quantile(0.50),
+        "p95_le_s": quantile(0.95),
+        "p99_le_s": quantile(0.99),
+    }
+
+
+class _RelayLoop:
+    """In-process outbox relay that also measures projector throughput (events the
+    API's event publisher projects are counted under event_publisher instead)"""
+
+    def __init__(self):
+        self.events = 0
+        self.busy_seconds = 0.0
+        self._stopped = False
+
+    async def run(self) -> None:
+        from app.config.settings import settings
+        from app.outbox_relay import drain_once
+
+        while not self._stopped:
+            start = time.perf_counter()
+            relayed = await drain_once()
+            if relayed:
+                self.events += relayed
+                self.busy_seconds += time.perf_counter() - start
+            if relayed < settings.OUTBOX_BATCH_SIZE:
+                await asyncio.sleep(settings.OUTBOX_POLL_INTERVAL_SECONDS)
+
+    async def stop(self) -> None:
+        from app.outbox_relay import drain_once
+
+        self._stopped = True
+        # Drain what is left so replication lag covers every write of the run
+        while relayed := await drain_once():
+            self.events += relayed
+
+    def summary(self, eager: bool) -> dict:
+        summary = {"events": self.events}
+        if eager:
+            # Eager Celery runs the projection inside drain_once, so this is end-to-end
+            summary["events_per_second"] = round(self.events / self.busy_seconds, 1) if self.busy_seconds else None
+        return summary
+
+
+def _configure_local_env(args) -> None:
+    """Point the app at local stand-ins; must run before anything imports app.*"""
+    data_dir = tempfile.mkdtemp(prefix="cqrs-load-")
+    os.environ.setdefault("WRITE_DB_URL", f"sqlite+aiosqlite:///{data_dir}/write.db")
+    os.environ.setdefault("READ_DB_URL", f"sqlite+aiosqlite:///{data_dir}/read.db")
+    os.environ.setdefault("READ_DB_SYNC_URL", f"sqlite:///{data_dir}/read.db")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    print(f"write DB: {os.environ['WRITE_DB_URL']}\nread DB:  {os.environ['READ_DB_URL']}")
+
+
+async def _create_tables() -> None:
+    from app.db.models import Base, READ_MODEL_TABLES, WRITE_MODEL_TABLES
+    from app.db.read_db import async_engine as read_engine
+    from app.db.write_db import async_engine as write_engine
+
+    for engine, tables in ((write_engine, WRITE_MODEL_TABLES), (read_engine, READ_MODEL_TABLES)):
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all, tables=tables)
+
+
+async def _dispose_engines() -> None:
+    from app.db.read_db import async_engine as read_engine
+    from app.db.write_db import async_engine as write_engine
+
+    await read_engine.dispose()
+    await write_engine.dispose()
+
+
+async def _seed(client, count: int) -> None:
+    from app.config.settings import settings
+
+    rng = random.Random(1)
+    for start in range(0, count, settings.TASK_BATCH_MAX_CREATE):
+        size = min(settings.TASK_BATCH_MAX_CREATE, count - start)
+        await client.post("/v1/tasks/batch", json=[
+            {"title": f"{rng.choice(_WORDS)} seed {start + i}", "description": rng.choice(_WORDS)}
+            for i in range(size)
+        ])
+
+
+async def _drive(client, args) -> dict:
+    recorder = Recorder()
+    if args.seed_tasks:
+        await _seed(client, args.seed_tasks)
+    before = _parse_metrics((await client.get("/metrics")).text)
+    start = time.perf_counter()
+    stop_at = start + args.duration
+    await asyncio.gather(*[
+        _user(client, recorder, stop_at, random.Random(seed)) for seed in range(args.users)
+    ])
+    elapsed = time.perf_counter() - start
+    return {"recorder": recorder, "elapsed": elapsed, "before": before}
+
+
+async def _run_local(args) -> dict:
+    import httpx
+
+    if not args.real_redis:
+        from benchmarks._support import use_fake_redis
+
+        use_fake_redis()
+    from app.celery_app import celery_app
+
+    celery_app.conf.task_always_eager = args.celery == "eager"
+    from app.main import app
+
+    await _create_tables()
+    relay = _RelayLoop()
+    try:
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=60) as client:
+                relay_task = asyncio.create_task(relay.run())
+                run = await _drive(client, args)
+                await relay.stop()
+                relay_task.cancel()
+                await asyncio.gather(relay_task, return_exceptions=True)
+                # Eager projection has run; with a separate worker give it a moment to catch up
+                if args.celery == "worker":
+                    await asyncio.sleep(2)
+                run["after"] = _parse_metrics((await client.get("/metrics")).text)
+    finally:
+        await _dispose_engines()
+    run["projector"] = relay.summary(eager=args.celery == "eager")
+    return run
+
+
+async def _run_remote(args) -> dict:
+    import httpx
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=60) as client:
+        run = await _drive(client, args)
+        await asyncio.sleep(2)  # let the running worker apply the tail of the run
+        run["after"] = _parse_metrics((await client.get("/metrics")).text)
+    run["projector"] = {"events": None}
+    return run
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+def _compare(current: dict, baseline: dict, max_regression: float) -> List[str]:
+    regressions = []
+    for label, now in current["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(label)
+        if not before:
+            continue
+        if before["throughput_rps"] and now["throughput_rps"] < before["throughput_rps"] * (1 - max_regression):
+            regressions.append(f"{label}: throughput {before['throughput_rps']} -> {now['throughput_rps']} rps")
+        if before["p95_ms"] and now["p95_ms"] > before["p95_ms"] * (1 + max_regression):
+            regressions.append(f"{label}: p95 {before['p95_ms']} -> {now['p95_ms']} ms")
+    return regressions
+
+
+def _print_report(result: dict) -> None:
+    print(f"\n{'endpoint':<28} {'reqs':>7} {'err':>5} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for label, stats in result["endpoints"].items():
+        print(f"{label:<28} {stats['requests']:>7} {stats['errors']:>5} {stats['throughput_rps']:>8.1f} "
+              f"{stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f}")
+    print(f"\ntotal: {result['totals']['requests']} requests, {result['totals']['throughput_rps']:.1f} rps")
+    for layer, stats in result["cache"].items():
+        print(f"cache {layer}: hit ratio {stats['hit_ratio']}")
+    print(f"projector: {result['projector']}")
+    print(f"replication lag: {result['replication_lag']}")
+    print(f"event publisher: {result['event_publisher']}")
+    print(f"event loop lag: {result['event_loop_lag']}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="run against a running server instead of in-process")
+    parser.add_argument("--users", type=int, default=10, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=20.0, help="seconds")
+    parser.add_argument("--seed-tasks", type=int, default=1000, help="tasks created before the run")
+    parser.add_argument("--real-redis", action="store_true", help="use REDIS_URL instead of fakeredis (in-process)")
+    parser.add_argument("--celery", choices=("eager", "worker"), default="eager")
+    parser.add_argument("--output", help="JSON result path (default benchmarks/results/load_test_<time>.json)")
+    parser.add_argument("--baseline", help="earlier JSON result to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.2)
+    args = parser.parse_args()
+
+    if not args.url:
+        _configure_local_env(args)
+    run = asyncio.run(_run_remote(args) if args.url else _run_local(args))
+
+    endpoints = run["recorder"].summary(run["elapsed"])
+    total_requests = sum(stats["requests"] for stats in endpoints.values())
+    result = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "git_commit": _git_commit(),
+            "mode": "remote" if args.url else "in-process",
+            "target": args.url or "asgi",
+            "users": args.users,
+            "duration_s": round(run["elapsed"], 2),
+            "seed_tasks": args.seed_tasks,
+            "redis": "real" if args.url or args.real_redis else "fakeredis",
+            "celery": None if args.url else args.celery,
+        },
+        "totals": {
+            "requests": total_requests,
+            "errors": sum(stats["errors"] for stats in endpoints.values()),
+            "throughput_rps": round(total_requests / run["elapsed"], 2),
+        },
+        "endpoints": endpoints,
+        "cache": _cache_summary(run["after"], run["before"]),
+        "projector": run["projector"],
+        "replication_lag": _lag_summary(run["after"], run["before"]),
+        "event_publisher": _event_publisher_summary(run["after"], run["before"]),
+        "event_loop_lag": _lag_summary(run["after"], run["before"], "event_loop_lag_seconds", "samples"),
+    }
+    _print_report(result)
+
+    output = args.output or os.path.join(
+        "benchmarks", "results", f"load_test_{datetime.utcnow():%Y%m%dT%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nresults written to {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = _compare(result, json.load(f), args.max_regression)
+        if regressions:
+            print(f"\nregressions beyond {args.max_regression:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"\nno regressions beyond {args.max_regression:.0%} vs {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,16 @@
 # init_db.py
 import asyncio
-from app.db.models import Base
+from app.db.models import Base, WRITE_MODEL_TABLES, READ_MODEL_TABLES
 from app.db.write_db import async_engine as write_engine
 from app.db.read_db import async_engine as read_engine
 
 async def create_tables():
     async with write_engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(Base.metadata.create_all, tables=WRITE_MODEL_TABLES)
     print("✅ Write DB tables created.")
 
     async with read_engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(Base.metadata.create_all, tables=READ_MODEL_TABLES)
     print("✅ Read DB tables created.")
 
 if __name__ == "__main__":